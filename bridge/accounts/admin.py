@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import JobSeekerProfile, SavedSearch, TalentMessage
+from .models import JobSeekerProfile, SavedSearch, TalentMessage, ExportJob
 
 
 @admin.register(JobSeekerProfile)
@@ -53,4 +53,15 @@ class TalentMessageAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("export", "format", "status", "requested_by", "rows_written", "file_size", "created_at", "finished_at")
+    list_filter = ("status", "export", "format")
+    search_fields = ("requested_by__username", "file_name")
+    readonly_fields = (
+        "rows_written", "rows_total", "rows_per_second", "progress_at",
+        "file_name", "file_size", "error", "created_at", "started_at", "finished_at",
+    )
+
 # Register your models here.
@@ -0,0 +1,215 @@
+"""
+Background admin exports.
+
+An admin enqueues an ExportJob from the export dashboard. The job is run
+either in a daemon thread of the web process once the request commits
+(EXPORT_JOBS_IN_PROCESS, the default) or by a separate `run_export_jobs
+--poll` worker. Either way the export's rows are written in chunks to a
+gzip-compressed CSV or NDJSON file under EXPORT_JOBS_DIR, progress is saved on
+the job every EXPORT_JOB_PROGRESS_INTERVAL seconds, and the finished file is
+served by a range-capable download view.
+
+A job is claimed with a conditional UPDATE (pending -> running), so however
+many threads and workers look at the queue each job runs once. Every later
+write is conditional on the claim (still running, same started_at): a run
+whose job was requeued as stale and claimed again stops at its next progress
+write and never overwrites the new run's result.
+
+Stale jobs are requeued by the worker command, and also whenever the
+dashboard loads or a job is enqueued; in-process, pending jobs left behind
+by a restarted web process are started again at those points.
+"""
+import csv
+import gzip
+import json
+import logging
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .exports import EXPORTS, chunked
+from .models import ExportJob
+
+
+# Seconds between progress writes while a job runs
+EXPORT_JOB_PROGRESS_INTERVAL = 2
+# A running job without progress for this long is assumed dead and requeued
+EXPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+
+logger = logging.getLogger(__name__)
+
+
+def export_jobs_dir():
+    return Path(getattr(settings, 'EXPORT_JOBS_DIR', settings.BASE_DIR / 'exports'))
+
+
+def export_job_path(job):
+    """Path of a finished job's file"""
+    return export_jobs_dir() / job.file_name
+
+
+class _CsvRows:
+    def __init__(self, file, header):
+        self.writer = csv.writer(file)
+        self.writer.writerow(header)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+
+class _NdjsonRows:
+    """One JSON object per line, keyed by the CSV headers"""
+
+    def __init__(self, file, header):
+        self.file = file
+        self.header = header
+
+    def write(self, rows):
+        self.file.write(''.join([
+            json.dumps(dict(zip(self.header, row)), cls=DjangoJSONEncoder) + '\n' for row in rows
+        ]))
+
+
+ROW_WRITERS = {
+    ExportJob.Format.CSV: _CsvRows,
+    ExportJob.Format.NDJSON: _NdjsonRows,
+}
+
+
+def claim_export_job(job_id):
+    """Mark a pending job as running; False if someone else already has it"""
+    now = timezone.now()
+    return bool(
+        ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.PENDING)
+        .update(status=ExportJob.Status.RUNNING, started_at=now, progress_at=now, rows_written=0, error='')
+    )
+
+
+class _Superseded(Exception):
+    """The job was requeued and claimed by another run"""
+
+
+def run_export_job(job_id):
+    """Claim and run one job; returns False if it was not pending"""
+    if not claim_export_job(job_id):
+        return False
+    job = ExportJob.objects.get(pk=job_id)
+    # This run's claim: updates through it do nothing once the job is requeued
+    claimed = ExportJob.objects.filter(pk=job_id, status=ExportJob.Status.RUNNING, started_at=job.started_at)
+    file_name = f'{job.export}_export_{job.pk}_{job.started_at:%Y%m%d_%H%M%S}.{job.format}.gz'
+    path = export_jobs_dir() / file_name
+    partial = path.with_name(path.name + '.part')
+    started = time.monotonic()
+    try:
+        export = EXPORTS[job.export]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        claimed.update(rows_total=export.queryset.count())
+        written = 0
+        last_progress = started
+        with gzip.open(partial, 'wt', encoding='utf-8', newline='') as file:
+            writer = ROW_WRITERS[job.format](file, export.header)
+            for chunk in chunked(export.rows()):
+                writer.write(chunk)
+                written += len(chunk)
+                if time.monotonic() - last_progress >= EXPORT_JOB_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    if not claimed.update(
+                        rows_written=written,
+                        rows_per_second=written / (last_progress - started),
+                        progress_at=timezone.now(),
+                    ):
+                        raise _Superseded
+        partial.replace(path)
+    except _Superseded:
+        logger.warning("Export job %s was requeued while running; abandoning this run", job_id)
+        partial.unlink(missing_ok=True)
+        return True
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        partial.unlink(missing_ok=True)
+        claimed.update(
+            status=ExportJob.Status.FAILED, error=str(exc) or type(exc).__name__, finished_at=timezone.now(),
+        )
+        return True
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    finished = claimed.update(
+        status=ExportJob.Status.DONE,
+        rows_written=written,
+        rows_per_second=written / elapsed,
+        progress_at=timezone.now(),
+        file_name=file_name,
+        file_size=path.stat().st_size,
+        finished_at=timezone.now(),
+    )
+    if not finished:
+        # Requeued after the last progress write; the new run's file is the one kept
+        path.unlink(missing_ok=True)
+    return True
+
+
+def _run_in_thread(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        # Background threads own their connection; don't leak it
+        connection.close()
+
+
+def _start_in_thread(job_id):
+    threading.Thread(target=_run_in_thread, args=(job_id,), daemon=True).start()
+
+
+def export_jobs_in_process():
+    return getattr(settings, 'EXPORT_JOBS_IN_PROCESS', True)
+
+
+def schedule_export_job(job):
+    """
+    Start a new job once the surrounding transaction commits: in a daemon
+    thread, or not at all when EXPORT_JOBS_IN_PROCESS is False and a
+    `run_export_jobs --poll` worker picks jobs up instead.
+    """
+    if not export_jobs_in_process():
+        return
+    job_id = job.pk
+    transaction.on_commit(lambda: _start_in_thread(job_id))
+
+
+def requeue_stale_export_jobs():
+    """Put running jobs whose worker stopped reporting progress back in the queue"""
+    return ExportJob.objects.filter(
+        status=ExportJob.Status.RUNNING, progress_at__lt=timezone.now() - EXPORT_JOB_STALE_AFTER,
+    ).update(status=ExportJob.Status.PENDING)
+
+
+def recover_export_jobs():
+    """
+    Requeue stale jobs and, with EXPORT_JOBS_IN_PROCESS, restart pending jobs
+    no thread picked up within EXPORT_JOB_STALE_AFTER (their web process
+    died), since no worker will. Returns how many jobs were restarted here.
+    """
+    requeue_stale_export_jobs()
+    if not export_jobs_in_process():
+        return 0
+    orphaned = list(
+        ExportJob.objects.filter(
+            status=ExportJob.Status.PENDING, created_at__lt=timezone.now() - EXPORT_JOB_STALE_AFTER,
+        ).order_by('created_at').values_list('pk', flat=True)
+    )
+    for job_id in orphaned:
+        transaction.on_commit(lambda job_id=job_id: _start_in_thread(job_id))
+    return len(orphaned)
+
+
+def delete_export_job(job):
+    """Delete a job together with its file"""
+    if job.file_name:
+        export_job_path(job).unlink(missing_ok=True)
+    job.delete()
@@ -0,0 +1,184 @@
+"""
+Full snapshot export: every admin export as CSV files in one streamed ZIP.
+
+A pool of producer threads reads the tables and formats them into CSV
+chunks, each table into its own bounded queue. The response's generator is
+the single zip writer: it takes the tables in EXPORTS order and compresses
+and sends each table's chunks as they arrive, so later tables are read while
+earlier ones go out and memory stays at a few chunks per table.
+
+All tables come from one database snapshot. Each producer reads its tables
+inside a single transaction; on PostgreSQL the first producer exports its
+REPEATABLE READ snapshot and the others import it, so the whole pool sees
+the same data. Other backends can't share a snapshot between connections
+and get one producer, whose transaction spans every table. On SQLite that
+long read only leaves writers free to commit in WAL mode, which the
+project's DATABASES settings turn on.
+"""
+import logging
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+
+from .exports import EXPORTS, aiterate, csv_chunks
+
+
+# Producer threads on backends that can share a snapshot between connections
+EXPORT_SNAPSHOT_WORKERS = 4
+# CSV chunks a producer may get ahead of the zip writer, per table
+EXPORT_SNAPSHOT_QUEUE_CHUNKS = 4
+# Seconds a blocked producer or writer waits before checking on the others
+EXPORT_SNAPSHOT_POLL = 0.5
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _ZipStream:
+    """Unseekable file that keeps what zipfile writes until it is taken"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def snapshot_workers(exports):
+    """Producer threads for a snapshot of `exports` on the default database"""
+    if connection.vendor == 'postgresql':
+        return max(1, min(EXPORT_SNAPSHOT_WORKERS, len(exports)))
+    return 1
+
+
+class Snapshot:
+    """One ZIP of `exports` (default: all of EXPORTS), read from one snapshot"""
+
+    def __init__(self, exports=None, workers=None):
+        self.exports = list(exports or EXPORTS.values())
+        self.workers = workers or snapshot_workers(self.exports)
+        self.pending = queue.SimpleQueue()
+        for export in self.exports:
+            self.pending.put(export)
+        self.chunks = {export.name: queue.Queue(maxsize=EXPORT_SNAPSHOT_QUEUE_CHUNKS) for export in self.exports}
+        self.cancelled = threading.Event()
+        self.error = None
+        # Producers meet once the first has exported its snapshot, then once all have imported it
+        self.exported = threading.Barrier(self.workers)
+        self.joined = threading.Barrier(self.workers)
+        self.snapshot_id = None
+
+    def _fail(self, exc):
+        if self.error is None:
+            self.error = exc
+        self.cancelled.set()
+        self.exported.abort()
+        self.joined.abort()
+
+    def _join_snapshot(self, index):
+        """Make this producer's transaction read the same snapshot as the first producer's"""
+        if self.workers > 1:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                if index == 0:
+                    cursor.execute('SELECT pg_export_snapshot()')
+                    self.snapshot_id = cursor.fetchone()[0]
+                self.exported.wait()
+                if index != 0:
+                    cursor.execute('SET TRANSACTION SNAPSHOT %s', [self.snapshot_id])
+        # Holds the first producer's transaction (and its snapshot) open until all have imported it
+        self.joined.wait()
+
+    def _put(self, chunks, item):
+        while True:
+            try:
+                chunks.put(item, timeout=EXPORT_SNAPSHOT_POLL)
+                return
+            except queue.Full:
+                if self.cancelled.is_set():
+                    raise _Cancelled
+
+    def _produce(self, index):
+        try:
+            with transaction.atomic():
+                self._join_snapshot(index)
+                while not self.cancelled.is_set():
+                    try:
+                        export = self.pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    chunks = self.chunks[export.name]
+                    for text in csv_chunks(export.header, export.rows()):
+                        self._put(chunks, text.encode('utf-8'))
+                    self._put(chunks, _DONE)
+        except (_Cancelled, threading.BrokenBarrierError):
+            pass
+        except Exception as exc:
+            logger.exception("Snapshot export producer failed")
+            self._fail(exc)
+        finally:
+            # Pool threads own their connection; don't leak it
+            connection.close()
+
+    def _get(self, chunks):
+        while True:
+            try:
+                return chunks.get(timeout=EXPORT_SNAPSHOT_POLL)
+            except queue.Empty:
+                if self.error is not None:
+                    raise self.error
+
+    def zip_chunks(self):
+        """The ZIP archive, in pieces as the producers deliver the tables"""
+        started = datetime.now()
+        stream = _ZipStream()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='export-snapshot')
+        for index in range(self.workers):
+            pool.submit(self._produce, index)
+        try:
+            with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for export in self.exports:
+                    entry = zipfile.ZipInfo(f'{export.name}.csv', date_time=started.timetuple()[:6])
+                    entry.compress_type = zipfile.ZIP_DEFLATED
+                    # Sizes aren't known up front, so allow for tables past 2 GiB
+                    with archive.open(entry, 'w', force_zip64=True) as file:
+                        while (chunk := self._get(self.chunks[export.name])) is not _DONE:
+                            file.write(chunk)
+                            if data := stream.take():
+                                yield data
+            yield stream.take()
+        finally:
+            # Stops the producers too if the client went away mid-download
+            self.cancelled.set()
+            self.exported.abort()
+            self.joined.abort()
+            pool.shutdown(wait=False)
+
+    def response(self, request):
+        content = self.zip_chunks()
+        if isinstance(request, ASGIRequest):
+            # The writer never touches the database, so it needn't hold the request's sync thread
+            content = aiterate(content, thread_sensitive=False)
+        response = StreamingHttpResponse(content, content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="snapshot_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip"'
+        return response
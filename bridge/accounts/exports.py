@@ -0,0 +1,425 @@
+"""
+Streaming CSV exports for the admin data export views.
+
+Each export is declared once in EXPORTS as an Export: a queryset, its
+columns and the annotations they use. Rows are read with
+values_list().iterator() in EXPORT_CHUNK_SIZE batches and written straight
+into a StreamingHttpResponse, so memory stays flat however large a table is
+and the first bytes leave before the last rows are read.
+
+Under ASGI the CSV generator is driven one chunk at a time from the request's
+sync thread; handing Django a plain sync iterator there would make it buffer
+the whole body before sending it.
+
+Incremental exports: ?since=<ISO datetime> or ?cursor=<X-Export-Cursor of a
+previous response> limits an export to rows changed in the window from that
+point up to EXPORT_DELTA_LAG ago, and every response (full or incremental)
+carries the cursor for the next window. Changes are read from each export's
+changed_at column; tables without one (auth users) and deletions of every
+table are recorded in ExportChange by signals, and deletions are served as a
+separate tombstone feed with the same parameters. Changes that leave a
+row's changed_at column alone are caught too: messages marked read (the read
+cursor lives on the conversation) are recorded in ExportChange, and edits to
+an exported many-to-many column bump the owner's updated_at.
+"""
+import csv
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import (
+    BooleanField, Case, Count, DurationField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import JobSeekerProfile, SavedSearch, Conversation, Message, ExportChange
+from jobs.models import Skill, Job, Application
+
+
+# Rows fetched from the database and written to the response at a time
+EXPORT_CHUNK_SIZE = 2000
+# Incremental windows end this long before "now", so rows written by
+# transactions still in flight when the export starts are not skipped
+EXPORT_DELTA_LAG = timedelta(seconds=60)
+EXPORT_CURSOR_SALT = 'accounts.exports.cursor'
+
+
+class _Echo:
+    """File-like object whose write() returns the CSV line it was handed"""
+
+    def write(self, value):
+        return value
+
+
+def chunked(rows, size=EXPORT_CHUNK_SIZE):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def csv_chunks(header, rows):
+    """CSV text for `header` and `rows`, one string per chunk of rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for chunk in chunked(rows):
+        yield ''.join([writer.writerow(row) for row in chunk])
+
+
+async def aiterate(iterator, thread_sensitive=True):
+    """
+    Async view of a sync iterator. By default each step runs in the request's
+    sync thread so the database cursor behind it stays on one connection.
+    """
+    step = sync_to_async(next, thread_sensitive=thread_sensitive)
+    done = object()
+    while (item := await step(iterator, done)) is not done:
+        yield item
+
+
+def streaming_csv_response(request, name, header, rows):
+    """A CSV attachment named after `name` that streams `rows` as it goes"""
+    content = csv_chunks(header, rows)
+    if isinstance(request, ASGIRequest):
+        content = aiterate(content)
+    response = StreamingHttpResponse(content, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{name}_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    return response
+
+
+def encode_export_cursor(export_name, until):
+    return signing.dumps({'export': export_name, 'until': until.isoformat()}, salt=EXPORT_CURSOR_SALT)
+
+
+def export_window(request, export_name):
+    """
+    (since, until) of the changes a request asks for; since is None for a
+    full export. Raises ValueError for a malformed `since` or a cursor that
+    wasn't issued for this export.
+    """
+    since = None
+    if request.GET.get('cursor'):
+        try:
+            cursor = signing.loads(request.GET['cursor'], salt=EXPORT_CURSOR_SALT)
+        except signing.BadSignature:
+            raise ValueError("Invalid cursor")
+        if cursor.get('export') != export_name:
+            raise ValueError("Cursor belongs to another export")
+        since = datetime.fromisoformat(cursor['until'])
+    elif request.GET.get('since'):
+        since = parse_datetime(request.GET['since'])
+        if since is None:
+            raise ValueError("since must be an ISO 8601 date and time")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since, dt_timezone.utc)
+    until = timezone.now() - EXPORT_DELTA_LAG
+    if since is not None:
+        until = max(until, since)
+    return since, until
+
+
+def _windowed_response(request, export_name, header, rows_for_window):
+    try:
+        since, until = export_window(request, export_name)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    response = streaming_csv_response(request, export_name, header, rows_for_window(since, until))
+    response['X-Export-Cursor'] = encode_export_cursor(export_name, until)
+    if since is not None:
+        response['X-Export-Since'] = since.isoformat()
+        response['X-Export-Until'] = until.isoformat()
+    return response
+
+
+def record_export_change(export_name, object_id, deleted=False):
+    """Upsert the ExportChange row of one exported record"""
+    record_export_changes(export_name, [object_id], deleted=deleted)
+
+
+def record_export_changes(export_name, object_ids, deleted=False):
+    """Upsert the ExportChange rows of several exported records in one query"""
+    now = timezone.now()
+    ExportChange.objects.bulk_create(
+        [ExportChange(export=export_name, object_id=object_id, changed_at=now, deleted=deleted) for object_id in object_ids],
+        update_conflicts=True,
+        unique_fields=['export', 'object_id'],
+        update_fields=['changed_at', 'deleted'],
+    )
+
+
+class Column:
+    """
+    One CSV column: `source` names a field lookup (e.g. "job__title") or one
+    of the export's annotations, and `convert`, if given, maps the fetched
+    value to what is written. `convert` only ever sees that value, never a
+    model instance, so a column cannot issue queries of its own.
+    """
+    many = False
+
+    def __init__(self, header, source, convert=None):
+        self.header = header
+        self.source = source
+        self.convert = convert
+
+
+class ManyColumn(Column):
+    """
+    Comma-separated `label` values of a many-to-many field, read once per
+    chunk of rows from the through table (in the order they were linked).
+    """
+    many = True
+
+    def __init__(self, header, source, label='name'):
+        super().__init__(header, source)
+        self.label = label
+
+    def values_by_owner(self, model, owner_ids):
+        field = model._meta.get_field(self.source)
+        owner = f'{field.m2m_field_name()}_id'
+        pairs = (
+            field.remote_field.through.objects.filter(**{f'{owner}__in': owner_ids})
+            .order_by(owner, 'pk')
+            .values_list(owner, f'{field.m2m_reverse_field_name()}__{self.label}')
+        )
+        values = defaultdict(list)
+        for owner_id, value in pairs:
+            values[owner_id].append(value)
+        return {owner_id: ', '.join(items) for owner_id, items in values.items()}
+
+
+class Export:
+    """
+    A CSV export of one model: its columns, plus any annotations (counts,
+    computed values) the columns refer to by name.
+
+    `changed_at` is the field or expression holding a row's last change,
+    which incremental exports filter on. With `track_changes` instead, saves
+    are recorded in ExportChange (for tables we can't add a column to). An
+    export with neither always returns every row. `logged_changes` adds the
+    rows recorded in ExportChange to those `changed_at` finds, for changes
+    made without touching that column.
+
+    Rows are read with a single values_list() query, in primary key order;
+    each ManyColumn adds one query per EXPORT_CHUNK_SIZE rows. The query
+    count therefore depends only on the number of chunks, never on what a
+    row contains.
+    """
+
+    def __init__(self, name, queryset, columns, annotations=None, changed_at=None, track_changes=False,
+                 logged_changes=False):
+        self.name = name
+        self.queryset = queryset
+        self.columns = columns
+        self.annotations = annotations or {}
+        self.changed_at = F(changed_at) if isinstance(changed_at, str) else changed_at
+        self.track_changes = track_changes
+        self.logged_changes = logged_changes
+
+    @property
+    def header(self):
+        return [column.header for column in self.columns]
+
+    def changed_between(self, queryset, since, until):
+        """`queryset` narrowed to rows changed after `since` and up to `until`"""
+        changes = ExportChange.objects.filter(
+            export=self.name, deleted=False, changed_at__gt=since, changed_at__lte=until,
+        ).values('object_id')
+        if self.track_changes:
+            return queryset.filter(pk__in=changes)
+        if self.changed_at is None:
+            return queryset
+        changed = Q(export_changed_at__gt=since, export_changed_at__lte=until)
+        if self.logged_changes:
+            changed |= Q(pk__in=changes)
+        return queryset.alias(export_changed_at=self.changed_at).filter(changed)
+
+    def rows(self, since=None, until=None):
+        """Every row, or with `since` only those changed after it (up to `until`)"""
+        queryset = self.queryset
+        if since is not None:
+            queryset = self.changed_between(queryset, since, until)
+        queryset = queryset.annotate(**self.annotations).order_by('pk')
+        fields = [column.source for column in self.columns if not column.many]
+        rows = queryset.values_list('pk', *fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        many = [column for column in self.columns if column.many]
+        for chunk in chunked(rows):
+            related = {
+                column: column.values_by_owner(queryset.model, [row[0] for row in chunk])
+                for column in many
+            }
+            for pk, *values in chunk:
+                values = iter(values)
+                row = []
+                for column in self.columns:
+                    if column.many:
+                        row.append(related[column].get(pk, ''))
+                        continue
+                    value = next(values)
+                    row.append(column.convert(value) if column.convert else value)
+                yield row
+
+    def deleted_rows(self, since=None, until=None):
+        """(id, deleted at) tombstones of rows deleted in the window"""
+        tombstones = ExportChange.objects.filter(export=self.name, deleted=True)
+        if since is not None:
+            tombstones = tombstones.filter(changed_at__gt=since, changed_at__lte=until)
+        return (
+            tombstones.order_by('changed_at', 'object_id')
+            .values_list('object_id', 'changed_at')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+    def response(self, request):
+        return _windowed_response(request, self.name, self.header, self.rows)
+
+    def deletions_response(self, request):
+        return _windowed_response(request, self.name, ['ID', 'Deleted At'], self.deleted_rows)
+
+
+def count_of(queryset, field):
+    """Correlated COUNT of `queryset` rows whose `field` points at the outer row"""
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(count=Count('*')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+EXPORTS = {export.name: export for export in [
+    Export('users', get_user_model().objects.all(), [
+        Column('ID', 'id'),
+        Column('Username', 'username'),
+        Column('Email', 'email'),
+        Column('First Name', 'first_name'),
+        Column('Last Name', 'last_name'),
+        Column('Is Staff', 'is_staff'),
+        Column('Is Superuser', 'is_superuser'),
+        Column('Is Active', 'is_active'),
+        Column('Date Joined', 'date_joined'),
+        Column('Last Login', 'last_login'),
+    ], track_changes=True),
+    Export('profiles', JobSeekerProfile.objects.all(), [
+        Column('User ID', 'user_id'),
+        Column('Username', 'user__username'),
+        Column('Account Type', 'account_type'),
+        Column('Headline', 'headline'),
+        Column('Bio', 'bio'),
+        Column('Education', 'education'),
+        Column('Experience', 'experience'),
+        Column('Location City', 'location_city'),
+        Column('Location State', 'location_state'),
+        Column('Location Country', 'location_country'),
+        Column('Latitude', 'latitude'),
+        Column('Longitude', 'longitude'),
+        Column('Commute Radius', 'commute_radius'),
+        Column('Portfolio URL', 'portfolio_url'),
+        Column('LinkedIn URL', 'linkedin_url'),
+        Column('GitHub URL', 'github_url'),
+        Column('Visibility', 'visibility'),
+        Column('Show Email', 'show_email'),
+        ManyColumn('Skills', 'skills'),
+        Column('Updated At', 'updated_at'),
+    ], changed_at='updated_at'),
+    Export('jobs', Job.objects.all(), [
+        Column('ID', 'id'),
+        Column('Title', 'title'),
+        Column('Company', 'company'),
+        Column('Description', 'description'),
+        Column('Location City', 'location_city'),
+        Column('Location State', 'location_state'),
+        Column('Location Country', 'location_country'),
+        Column('Latitude', 'latitude'),
+        Column('Longitude', 'longitude'),
+        Column('Min Salary', 'min_salary'),
+        Column('Max Salary', 'max_salary'),
+        Column('Work Type', 'work_type'),
+        Column('Visa Sponsorship', 'visa_sponsorship'),
+        Column('Posted By (Username)', 'posted_by__username', lambda username: username or 'N/A'),
+        ManyColumn('Skills', 'skills'),
+        Column('Created At', 'created_at'),
+    ], changed_at='updated_at'),
+    Export('applications', Application.objects.all(), [
+        Column('ID', 'id'),
+        Column('Job Title', 'job__title'),
+        Column('Job Company', 'job__company'),
+        Column('Applicant Username', 'applicant__username'),
+        Column('Applicant Email', 'applicant__email'),
+        Column('Status', 'status'),
+        Column('Priority', 'priority'),
+        Column('Flagged', 'flagged'),
+        Column('Applicant Note', 'note'),
+        Column('Recruiter Notes', 'recruiter_notes'),
+        Column('Stage Rank', 'stage_rank'),
+        Column('Days in Current Stage', 'time_in_stage', lambda duration: duration.days),
+        Column('Stage Changed At', 'stage_changed_at'),
+        Column('Created At', 'created_at'),
+        Column('Updated At', 'updated_at'),
+    ], changed_at='updated_at', annotations={
+        # Same as Application.days_in_current_stage()
+        'time_in_stage': ExpressionWrapper(
+            Now() - Coalesce('stage_changed_at', 'created_at'), output_field=DurationField(),
+        ),
+    }),
+    Export('skills', Skill.objects.all(), [
+        Column('ID', 'id'),
+        Column('Skill Name', 'name'),
+        Column('Number of Jobs', 'job_count'),
+        Column('Number of Profiles', 'profile_count'),
+    # No changed_at: the counts move whenever jobs or profiles do, and the
+    # table is small, so incremental requests get every skill
+    ], annotations={
+        'job_count': count_of(Job.skills.through.objects.all(), 'skill'),
+        'profile_count': count_of(JobSeekerProfile.skills.through.objects.all(), 'skill'),
+    }),
+    Export('conversations', Conversation.objects.all(), [
+        Column('ID', 'id'),
+        Column('Recruiter Username', 'recruiter__username'),
+        Column('Candidate Username', 'candidate__username'),
+        Column('Message Count', 'message_count'),
+        Column('Created At', 'created_at'),
+        Column('Updated At', 'updated_at'),
+    ], changed_at='updated_at', annotations={
+        'message_count': count_of(Message.objects.all(), 'conversation'),
+    }),
+    Export('messages', Message.objects.all(), [
+        Column('ID', 'id'),
+        Column('Conversation ID', 'conversation_id'),
+        Column('Sender Username', 'sender__username'),
+        Column('Content', 'content'),
+        Column('Is Read', 'read'),
+        Column('Created At', 'created_at'),
+    # Marking messages read moves the conversation's cursor, not the message,
+    # so mark_conversation_read() logs the messages it marks
+    ], changed_at='created_at', logged_changes=True, annotations={
+        # Same as Message.is_read: the recipient's read cursor has reached it
+        'read': Case(
+            When(
+                sender_id=F('conversation__recruiter_id'),
+                then=ExpressionWrapper(Q(id__lte=F('conversation__candidate_last_read_message_id')), output_field=BooleanField()),
+            ),
+            default=ExpressionWrapper(Q(id__lte=F('conversation__recruiter_last_read_message_id')), output_field=BooleanField()),
+            output_field=BooleanField(),
+        ),
+    }),
+    Export('saved_searches', SavedSearch.objects.all(), [
+        Column('ID', 'id'),
+        Column('Recruiter Username', 'recruiter__username'),
+        Column('Search Name', 'name'),
+        Column('Query', 'query'),
+        ManyColumn('Skills', 'skills'),
+        Column('Location City', 'location_city'),
+        Column('Location State', 'location_state'),
+        Column('Location Country', 'location_country'),
+        Column('Is Active', 'is_active'),
+        Column('Last Check', 'last_check'),
+        Column('Created At', 'created_at'),
+        Column('Updated At', 'updated_at'),
+    ], changed_at=Greatest('updated_at', Coalesce('last_check', 'updated_at'))),
+]}
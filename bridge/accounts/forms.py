@@ -2,10 +2,11 @@ from django import forms
 from .models import SavedSearch, JobSeekerProfile, Message
 from jobs.models import Skill
 from django.contrib.auth import get_user_model # Restored get_user_model
-import urllib.request
-import urllib.parse
-import json
-import time
+import logging
+
+from .geocoding import GeocodingError, geocode
+
+logger = logging.getLogger(__name__)
 
 
 class SavedSearchForm(forms.ModelForm):
@@ -95,42 +96,16 @@ class JobSeekerProfileForm(forms.ModelForm):
     )
 
     def geocode_location(self, city, state, country):
-        """Convert location text to latitude/longitude using Nominatim (OpenStreetMap)"""
+        """Convert location text to latitude/longitude (cached, see accounts.geocoding)"""
         try:
-            # Build location query
-            location_parts = [p for p in [city, state, country] if p]
-            if not location_parts:
-                return None, None
-            
-            location_query = ', '.join(location_parts)
-            
-            # Use Nominatim API (free, no API key required)
-            base_url = 'https://nominatim.openstreetmap.org/search'
-            params = {
-                'q': location_query,
-                'format': 'json',
-                'limit': 1
-            }
-            
-            url = f"{base_url}?{urllib.parse.urlencode(params)}"
-            
-            # Add user agent (required by Nominatim)
-            req = urllib.request.Request(url, headers={'User-Agent': 'JobBridge/1.0'})
-            
-            with urllib.request.urlopen(req, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                
-                if data and len(data) > 0:
-                    lat = float(data[0]['lat'])
-                    lon = float(data[0]['lon'])
-                    return lat, lon
-                    
-            return None, None
-            
-        except Exception as e:
+            location = geocode(city, state, country)
+        except GeocodingError as e:
             # If geocoding fails, just return None and don't block the save
-            print(f"Geocoding error: {e}")
+            logger.warning("Geocoding error: %s", e)
+            return None, None
+        if location is None:
             return None, None
+        return location.latitude, location.longitude
 
     def save(self, commit=True):
         instance = super().save(commit=False)
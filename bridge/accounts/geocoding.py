@@ -0,0 +1,174 @@
+"""
+Geocoding of free-text locations ("Atlanta, GA, USA") to coordinates.
+
+geocode() normalizes the location (case, whitespace, stray punctuation) and
+looks it up in GeocodedLocation first, so a location anyone has asked for
+before never leaves the process again until its entry expires. Only misses go
+to the geocoder backend. Answers are kept for GEOCODE_CACHE_TTL and locations
+the backend could not place for GEOCODE_MISS_TTL, so bad input isn't retried
+on every save. A backend failure (network error, bad response) raises
+GeocodingError and is not cached.
+
+The backend is pluggable through settings.GEOCODING_BACKEND. The default
+NominatimGeocoder calls OpenStreetMap's Nominatim at most once a second per
+process, as its usage policy asks; StaticGeocoder answers from a fixed table
+and never touches the network, for tests and offline development.
+"""
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import GeocodedLocation
+
+
+DEFAULT_GEOCODING_BACKEND = 'accounts.geocoding.NominatimGeocoder'
+# How long a found location is reused before it is looked up again
+GEOCODE_CACHE_TTL = timedelta(days=180)
+# How long a location the backend couldn't place is reported as not found
+GEOCODE_MISS_TTL = timedelta(days=7)
+
+# Coordinates are stored to six decimal places (about 10 cm), like the location fields
+COORDINATE_PLACES = Decimal('0.000001')
+
+Location = namedtuple('Location', ['latitude', 'longitude', 'confidence'])
+
+
+def coordinate(value):
+    """`value` as a Decimal rounded to COORDINATE_PLACES"""
+    return Decimal(str(value)).quantize(COORDINATE_PLACES)
+
+
+class GeocodingError(Exception):
+    """The backend could not answer (as opposed to answering "not found")"""
+
+
+class BaseGeocoder(ABC):
+    """Interface for geocoder backends"""
+
+    @abstractmethod
+    def lookup(self, query):
+        """
+        A Location for the normalized `query`, or None if it can't be placed.
+        Raises GeocodingError if the backend fails.
+        """
+
+
+class NominatimGeocoder(BaseGeocoder):
+    url = 'https://nominatim.openstreetmap.org/search'
+    # Nominatim requires an identifying User-Agent
+    user_agent = 'JobBridge/1.0'
+    timeout = 5
+    # Seconds between requests (Nominatim allows at most one per second)
+    min_interval = 1.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+
+    def lookup(self, query):
+        params = urllib.parse.urlencode({'q': query, 'format': 'json', 'limit': 1})
+        request = urllib.request.Request(f'{self.url}?{params}', headers={'User-Agent': self.user_agent})
+        with self._lock:
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    data = json.loads(response.read().decode())
+            except (OSError, ValueError) as exc:
+                raise GeocodingError(str(exc) or type(exc).__name__) from exc
+            finally:
+                self._last_request = time.monotonic()
+
+        if not data:
+            return None
+        try:
+            importance = data[0].get('importance')
+            return Location(
+                coordinate(data[0]['lat']), coordinate(data[0]['lon']),
+                float(importance) if importance is not None else None,
+            )
+        except (KeyError, TypeError, ArithmeticError, ValueError) as exc:
+            raise GeocodingError(f'Unexpected Nominatim response: {exc}') from exc
+
+
+class StaticGeocoder(BaseGeocoder):
+    """
+    Answers from settings.GEOCODING_STATIC_LOCATIONS ({location: (latitude,
+    longitude)}); anything else is not found. `queries` records what was asked.
+    """
+
+    def __init__(self, locations=None):
+        if locations is None:
+            locations = getattr(settings, 'GEOCODING_STATIC_LOCATIONS', {})
+        self.locations = {normalize_location(name): place for name, place in locations.items()}
+        self.queries = []
+
+    def lookup(self, query):
+        self.queries.append(query)
+        place = self.locations.get(query)
+        if place is None:
+            return None
+        return Location(coordinate(place[0]), coordinate(place[1]), 1.0)
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    return import_string(getattr(settings, 'GEOCODING_BACKEND', DEFAULT_GEOCODING_BACKEND))()
+
+
+def normalize_location(*parts):
+    """
+    Cache key for a location given as one string or as (city, state, country):
+    lowercase, single-spaced, comma-separated, without empty parts.
+    """
+    pieces = []
+    for part in parts:
+        for piece in (part or '').split(','):
+            piece = ' '.join(piece.split()).strip(' .;').casefold()
+            if piece:
+                pieces.append(piece)
+    return ', '.join(pieces)[:255]
+
+
+def geocode(*parts):
+    """
+    Location of (city, state, country) or a location string, or None if it
+    can't be placed. Raises GeocodingError if it had to ask the backend and
+    the backend failed.
+    """
+    query = normalize_location(*parts)
+    if not query:
+        return None
+    now = timezone.now()
+    cached = GeocodedLocation.objects.filter(query=query, expires_at__gt=now).first()
+    if cached is not None:
+        return Location(cached.latitude, cached.longitude, cached.confidence) if cached.found else None
+
+    location = get_geocoder().lookup(query)
+    GeocodedLocation.objects.bulk_create(
+        [GeocodedLocation(
+            query=query,
+            found=location is not None,
+            latitude=location.latitude if location else None,
+            longitude=location.longitude if location else None,
+            confidence=location.confidence if location else None,
+            looked_up_at=now,
+            expires_at=now + (GEOCODE_CACHE_TTL if location else GEOCODE_MISS_TTL),
+        )],
+        update_conflicts=True,
+        unique_fields=['query'],
+        update_fields=['found', 'latitude', 'longitude', 'confidence', 'looked_up_at', 'expires_at'],
+    )
+    return location
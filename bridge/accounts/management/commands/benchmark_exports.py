@@ -0,0 +1,141 @@
+"""
+Memory and latency benchmark for the admin CSV export views.
+
+Each export runs in a freshly forked process so its peak RSS is measured on
+its own: the child calls the view directly (as a superuser), drains the
+response the way a server would and reports the peak resident set size above
+what it started with, the time to the first chunk and the total time.
+
+--seed adds that many throwaway users with one application each before
+measuring and deletes them again afterwards. Unix only (needs fork).
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import RequestFactory
+
+from accounts import views
+from accounts.stats import adjust_stat_counters
+from jobs.models import Job, Application
+
+
+EXPORT_VIEWS = {
+    'users': views.export_users,
+    'profiles': views.export_profiles,
+    'jobs': views.export_jobs,
+    'applications': views.export_applications,
+    'skills': views.export_skills,
+    'conversations': views.export_conversations,
+    'messages': views.export_messages,
+    'saved_searches': views.export_saved_searches,
+}
+SEED_PREFIX = 'export-bench-'
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _measure(name, connection):
+    """Child process: run one export and send back its measurements"""
+    # Never share the parent's database connection across the fork
+    connections.close_all()
+    start_rss = _peak_rss_bytes()
+    request = RequestFactory().get('/')
+    request.user = get_user_model()(username='export-benchmark', is_superuser=True)
+
+    started = time.perf_counter()
+    response = EXPORT_VIEWS[name](request)
+    first_chunk = None
+    size = 0
+    for chunk in response:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    response.close()
+    connection.send({
+        'bytes': size, 'first_chunk': first_chunk or elapsed, 'elapsed': elapsed,
+        'peak_rss': _peak_rss_bytes() - start_rss,
+    })
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Measure peak RSS and latency of the admin CSV exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exports', nargs='*', help=f"Exports to run (default: all of {', '.join(EXPORT_VIEWS)})")
+        parser.add_argument('--seed', type=int, default=0, help='Throwaway users/applications to add while measuring')
+
+    def handle(self, *args, **options):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('benchmark_exports needs a platform that supports fork()')
+        names = options['exports'] or list(EXPORT_VIEWS)
+        unknown = set(names) - set(EXPORT_VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown exports: {', '.join(sorted(unknown))}")
+
+        if options['seed']:
+            self._seed(options['seed'])
+        try:
+            results = [(name, self._run(name)) for name in names]
+        finally:
+            if options['seed']:
+                self._unseed()
+        self._report(results)
+
+    def _run(self, name):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_measure, args=(name, sender))
+        process.start()
+        sender.close()
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = None
+        process.join()
+        if result is None:
+            raise CommandError(f'The {name} export failed (exit code {process.exitcode})')
+        return result
+
+    def _seed(self, count):
+        self.stdout.write(f"Seeding {count} users with one application each...")
+        User = get_user_model()
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [User(username=f'{SEED_PREFIX}{i}', email=f'{SEED_PREFIX}{i}@example.com') for i in range(count)],
+                batch_size=2000,
+            )
+            job = Job.objects.create(title='Export benchmark', company='Benchmark', description='Benchmark job')
+            applicant_ids = User.objects.filter(username__startswith=SEED_PREFIX).values_list('pk', flat=True)
+            Application.objects.bulk_create(
+                [Application(job=job, applicant_id=pk, note='Benchmark application ' * 4) for pk in applicant_ids.iterator()],
+                batch_size=2000,
+            )
+            # bulk_create skips post_save; keep the dashboard counters right for the deletes in _unseed
+            adjust_stat_counters({'users': count, 'applications': count})
+
+    def _unseed(self):
+        with transaction.atomic():
+            Job.objects.filter(title='Export benchmark', company='Benchmark', posted_by=None).delete()
+            get_user_model().objects.filter(username__startswith=SEED_PREFIX).delete()
+
+    def _report(self, results):
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(self.style.SUCCESS("\nExport benchmark complete!"))
+        for name, result in results:
+            self.stdout.write(
+                f"  {name}: {result['bytes'] / 1e6:.1f} MB, "
+                f"first chunk {result['first_chunk'] * 1000:.0f} ms, total {result['elapsed']:.2f}s, "
+                f"peak RSS +{result['peak_rss'] / 2**20:.1f} MiB"
+            )
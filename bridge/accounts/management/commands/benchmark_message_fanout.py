@@ -0,0 +1,169 @@
+"""
+Local load test for real-time conversation delivery.
+
+Opens many WebSocket clients on one conversation by driving the ASGI socket
+application in-process (no network, no extra dependencies), publishes events
+through the configured broker from a separate thread, as a committed request
+would, and reports the publish-to-client fan-out latency.
+
+The clients authenticate as the conversation's two participants with real
+sessions, which are deleted again at the end. No messages are written.
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Conversation
+from accounts.realtime import conversation_socket, get_broker
+
+
+class FakeClient:
+    """Feeds ASGI events to one socket and timestamps what it sends back"""
+
+    def __init__(self, path, cookie, expected):
+        self.scope = {
+            'type': 'websocket',
+            'path': path,
+            'headers': [(b'cookie', cookie.encode('latin-1'))],
+        }
+        self.inbox = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.done = asyncio.Event()
+        self.expected = expected
+        self.latencies = []
+
+    async def handshake(self):
+        """Wait until the server accepts or refuses the socket"""
+        waiters = {asyncio.ensure_future(self.accepted.wait()), asyncio.ensure_future(self.closed.wait())}
+        _, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send(self, event):
+        if event['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif event['type'] == 'websocket.close':
+            self.closed.set()
+        elif event['type'] == 'websocket.send':
+            received_at = time.perf_counter()
+            data = json.loads(event['text'])
+            if data.get('type') == 'benchmark':
+                self.latencies.append(received_at - data['sent_at'])
+                if len(self.latencies) >= self.expected:
+                    self.done.set()
+
+
+class Command(BaseCommand):
+    help = 'Measure WebSocket fan-out latency for one conversation with many local clients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conversation_id', type=int, help='Conversation whose participants the clients log in as')
+        parser.add_argument('--clients', type=int, default=100, help='Number of concurrent sockets')
+        parser.add_argument('--messages', type=int, default=200, help='Number of events to publish')
+        parser.add_argument(
+            '--interval', type=float, default=0.005,
+            help='Seconds between published events (0 publishes as fast as possible)',
+        )
+        parser.add_argument('--timeout', type=float, default=60, help='Seconds to wait for every delivery')
+
+    def handle(self, *args, **options):
+        conversation = Conversation.objects.select_related('recruiter', 'candidate').filter(
+            pk=options['conversation_id']
+        ).first()
+        if conversation is None:
+            raise CommandError(f"Conversation {options['conversation_id']} does not exist")
+
+        sessions = [self._login(user) for user in (conversation.recruiter, conversation.candidate)]
+        try:
+            result = asyncio.run(self._run(conversation.pk, sessions, options))
+        finally:
+            for session in sessions:
+                session.delete()
+        self._report(*result, options)
+
+    def _login(self, user):
+        """A saved session for `user`, as django.contrib.auth.login would create"""
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session
+
+    async def _run(self, conversation_id, sessions, options):
+        client_count = max(options['clients'], 1)
+        message_count = max(options['messages'], 1)
+        cookies = [f"{settings.SESSION_COOKIE_NAME}={session.session_key}" for session in sessions]
+
+        path = f"/ws/conversations/{conversation_id}/"
+        clients = [FakeClient(path, cookies[i % len(cookies)], message_count) for i in range(client_count)]
+        tasks = []
+        started = time.perf_counter()
+        for client in clients:
+            tasks.append(asyncio.ensure_future(conversation_socket(client.scope, client.receive, client.send)))
+            client.inbox.put_nowait({'type': 'websocket.connect'})
+        await asyncio.wait_for(asyncio.gather(*(client.handshake() for client in clients)), options['timeout'])
+        if any(not client.accepted.is_set() for client in clients):
+            for task in tasks:
+                task.cancel()
+            raise CommandError('Not every client was accepted; check the conversation participants')
+        connect_seconds = time.perf_counter() - started
+
+        def publish():
+            broker = get_broker()
+            for seq in range(message_count):
+                broker.publish(conversation_id, json.dumps({
+                    'type': 'benchmark', 'seq': seq, 'sent_at': time.perf_counter(),
+                }))
+                if options['interval']:
+                    time.sleep(options['interval'])
+
+        publish_started = time.perf_counter()
+        publisher = threading.Thread(target=publish, daemon=True)
+        publisher.start()
+        await asyncio.wait(
+            [asyncio.ensure_future(client.done.wait()) for client in clients],
+            timeout=options['timeout'],
+        )
+        elapsed = time.perf_counter() - publish_started
+        publisher.join()
+
+        for client in clients:
+            client.inbox.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        latencies = [latency for client in clients for latency in client.latencies]
+        return client_count, message_count, connect_seconds, elapsed, latencies
+
+    def _report(self, client_count, message_count, connect_seconds, elapsed, latencies, options):
+        expected = client_count * message_count
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(self.style.SUCCESS("\nFan-out benchmark complete!"))
+        self.stdout.write(f"  Broker: {type(get_broker()).__name__}")
+        self.stdout.write(f"  Clients: {client_count} (connected in {connect_seconds * 1000:.1f} ms)")
+        self.stdout.write(f"  Events published: {message_count}")
+        self.stdout.write(f"  Deliveries: {len(latencies)}/{expected} in {elapsed:.2f}s ({len(latencies) / max(elapsed, 1e-6):.0f}/sec)")
+        if not latencies:
+            return
+        latencies = sorted(latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        self.stdout.write(
+            f"  Latency ms: mean {statistics.mean(latencies) * 1000:.2f}, p50 {percentile(50):.2f}, "
+            f"p95 {percentile(95):.2f}, p99 {percentile(99):.2f}, max {latencies[-1] * 1000:.2f}"
+        )
+        if len(latencies) < expected:
+            self.stdout.write(self.style.WARNING(f"  {expected - len(latencies)} deliveries missed the {options['timeout']}s timeout"))
@@ -0,0 +1,15 @@
+"""
+Management command to repair drift in the admin dashboard row counters.
+"""
+from django.core.management.base import BaseCommand
+
+from accounts.stats import reconcile_stat_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount the tables behind the admin dashboard counters and fix any that drifted'
+
+    def handle(self, *args, **options):
+        repaired = reconcile_stat_counters()
+        self.stdout.write(self.style.SUCCESS("Dashboard counters reconciled."))
+        self.stdout.write(f"  Counters repaired: {repaired}")
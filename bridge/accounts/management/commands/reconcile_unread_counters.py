@@ -0,0 +1,16 @@
+"""
+Management command to repair drift in the denormalized unread counters.
+"""
+from django.core.management.base import BaseCommand
+
+from accounts.notifications import reconcile_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-user and per-conversation unread counters from the message tables'
+
+    def handle(self, *args, **options):
+        conversations_fixed, users_fixed = reconcile_unread_counters()
+        self.stdout.write(self.style.SUCCESS("Unread counters reconciled."))
+        self.stdout.write(f"  Conversations repaired: {conversations_fixed}")
+        self.stdout.write(f"  User counters repaired: {users_fixed}")
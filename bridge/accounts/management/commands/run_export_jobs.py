@@ -0,0 +1,69 @@
+"""
+Management command that works through queued admin export jobs.
+
+Run it once (e.g. from cron) to pick up jobs left behind by a restarted web
+process, or with --poll to keep a dedicated export worker running when
+EXPORT_JOBS_IN_PROCESS is False. Running jobs that stopped reporting progress
+are requeued first; --purge-days deletes old jobs and their files.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.export_jobs import delete_export_job, requeue_stale_export_jobs, run_export_job
+from accounts.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending admin export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll', type=float, default=0,
+            help='Keep running, checking for new jobs every this many seconds',
+        )
+        parser.add_argument('--purge-days', type=int, help='Delete jobs (and files) created more than this many days ago')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            self._purge(options['purge_days'])
+
+        while True:
+            requeued = requeue_stale_export_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Requeued {requeued} stalled export job(s)"))
+            ran = self._run_pending()
+            if not options['poll']:
+                break
+            if not ran:
+                time.sleep(options['poll'])
+
+    def _run_pending(self):
+        ran = 0
+        job_ids = ExportJob.objects.filter(status=ExportJob.Status.PENDING).order_by('created_at').values_list('pk', flat=True)
+        for job_id in list(job_ids):
+            if not run_export_job(job_id):
+                # Claimed by another worker in the meantime
+                continue
+            ran += 1
+            job = ExportJob.objects.get(pk=job_id)
+            if job.status == ExportJob.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Export job {job.pk} ({job.export}.{job.format}): {job.rows_written} rows, "
+                    f"{job.file_size / 1e6:.1f} MB, {job.rows_per_second:.0f} rows/sec"
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f"Export job {job.pk} ({job.export}) failed: {job.error}"))
+        return ran
+
+    def _purge(self, days):
+        old_jobs = ExportJob.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).exclude(
+            status=ExportJob.Status.RUNNING,
+        )
+        purged = 0
+        for job in old_jobs.iterator():
+            delete_export_job(job)
+            purged += 1
+        self.stdout.write(f"Purged {purged} export job(s) older than {days} days")
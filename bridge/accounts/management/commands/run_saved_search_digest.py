@@ -0,0 +1,170 @@
+"""
+Management command to evaluate every active saved search and record new talent matches.
+
+Intended to be run on a schedule (cron, systemd timer, ...). Searches are split
+into shards that are evaluated in a process pool; the parent process writes the
+resulting TalentMessages in bulk and advances last_check one shard at a time,
+so an interrupted run can simply be started again.
+
+With --email, digests are built from every new match not yet emailed
+(TalentMessage.emailed_at is null) rather than from this run's matches, and
+each recruiter's matches are marked as soon as their email is sent. A run
+interrupted before or during the emails sends the rest next time.
+"""
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.matching import find_match_rows, save_new_match_messages
+from accounts.models import SavedSearch, TalentMessage
+
+
+def _init_worker():
+    # Spawned workers need their own app registry; forked ones must not
+    # reuse the parent's database connections
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _evaluate_shard(search_ids):
+    """Worker entry point: return (search_ids, match rows) for one shard"""
+    searches = SavedSearch.objects.filter(pk__in=search_ids).prefetch_related('skills')
+    return search_ids, find_match_rows(searches, since_last_check=True)
+
+
+class Command(BaseCommand):
+    help = 'Evaluate active saved searches since their last check and record new matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Number of worker processes (0 evaluates in this process)',
+        )
+        parser.add_argument(
+            '--shard-size', type=int, default=50,
+            help='Number of saved searches evaluated per task',
+        )
+        parser.add_argument(
+            '--email', action='store_true',
+            help='Send one digest email per recruiter with their new matches',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 0)
+        shard_size = max(options['shard_size'], 1)
+
+        started = time.monotonic()
+        run_started_at = timezone.now()
+
+        search_ids = list(
+            SavedSearch.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)
+        )
+        total = len(search_ids)
+        if not total:
+            self.stdout.write(self.style.WARNING('No active saved searches found.'))
+            return
+
+        shards = [search_ids[i:i + shard_size] for i in range(0, total, shard_size)]
+        self.stdout.write(f"Evaluating {total} saved searches in {len(shards)} shard(s) with {workers or 'no'} worker(s)...")
+
+        evaluated = 0
+        matched_pairs = 0
+        new_messages = []
+
+        for shard_ids, rows in self._evaluate(shards, workers):
+            with transaction.atomic():
+                saved_searches = SavedSearch.objects.in_bulk(shard_ids)
+                # last_check is advanced to the run start so profiles edited
+                # while the run was in progress are picked up next time
+                created = save_new_match_messages(
+                    saved_searches, rows, checked_search_ids=shard_ids, checked_at=run_started_at,
+                )
+            evaluated += len(shard_ids)
+            matched_pairs += len(rows)
+            new_messages.extend(created)
+
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f"  [{evaluated}/{total}] {len(rows)} matches, {len(created)} new "
+                f"({evaluated / elapsed:.1f} searches/sec)"
+            )
+
+        if options['email']:
+            sent = self._send_digests()
+            self.stdout.write(f"Sent {sent} digest email(s)")
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(self.style.SUCCESS("\nSaved search digest complete!"))
+        self.stdout.write(f"  Searches evaluated: {evaluated}")
+        self.stdout.write(f"  Matches evaluated: {matched_pairs}")
+        self.stdout.write(f"  New notifications: {len(new_messages)}")
+        self.stdout.write(f"  Elapsed: {elapsed:.2f}s ({evaluated / elapsed:.1f} searches/sec, {matched_pairs / elapsed:.1f} matches/sec)")
+
+    def _evaluate(self, shards, workers):
+        """Yield (search_ids, rows) per shard, in-process or from a process pool"""
+        if workers == 0 or len(shards) == 1:
+            for shard_ids in shards:
+                yield _evaluate_shard(shard_ids)
+            return
+
+        # Connections must not be shared with forked children
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_evaluate_shard, shard_ids) for shard_ids in shards]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _send_digests(self):
+        """
+        Email each recruiter their unread matches not yet emailed, over a
+        single SMTP connection, marking them emailed recruiter by recruiter
+        """
+        pending = defaultdict(list)
+        for message in (
+            TalentMessage.objects.filter(message_type=TalentMessage.MessageType.NEW_MATCH, emailed_at__isnull=True)
+            .only('recruiter_id', 'title', 'content', 'is_read')
+            .order_by('created_at', 'pk')
+            .iterator()
+        ):
+            pending[message.recruiter_id].append(message)
+
+        if not pending:
+            return 0
+        recruiters = get_user_model().objects.in_bulk(pending.keys())
+        inbox_url = f"{settings.SITE_URL}{reverse('accounts:talent_messages')}"
+
+        sent = 0
+        # The connection is opened once and reused for every email
+        with get_connection() as connection:
+            for recruiter_id, messages in pending.items():
+                recruiter = recruiters.get(recruiter_id)
+                # Matches already read in the app aren't news
+                unread = [message for message in messages if not message.is_read]
+                if unread and recruiter and recruiter.email:
+                    lines = [f"- {message.title}: {message.content.strip()}" for message in unread]
+                    body = (
+                        f"Hi {recruiter.username},\n\n"
+                        f"Your saved searches found {len(unread)} new candidate match(es):\n\n"
+                        + "\n".join(lines)
+                        + f"\n\nView them on Bridge: {inbox_url}\n"
+                    )
+                    sent += connection.send_messages([EmailMessage(
+                        subject=f"{len(unread)} new candidate match(es) on Bridge",
+                        body=body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[recruiter.email],
+                    )]) or 0
+                # Marked right after sending, so an interrupted run only resends the email in flight
+                TalentMessage.objects.filter(pk__in=[message.pk for message in messages]).update(emailed_at=timezone.now())
+        return sent
@@ -0,0 +1,202 @@
+"""
+Set-based evaluation of saved searches against job seeker profiles.
+
+These helpers compute (saved search, profile) match pairs in a handful of
+queries instead of one query per search and one get_or_create per profile.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import SavedSearch, TalentMessage
+from .notifications import talent_messages_created
+
+
+# SQLite caps compound SELECTs at 500 terms; stay well below that
+UNION_CHUNK_SIZE = 50
+BULK_BATCH_SIZE = 500
+BACKFILL_CHUNK_SIZE = 2000
+
+logger = logging.getLogger(__name__)
+
+
+def _match_rows_query(saved_search, since_last_check):
+    """Projection of (search id, profile id, username, headline) for one search"""
+    if since_last_check:
+        profiles = saved_search.get_new_matches_since_last_check()
+    else:
+        profiles = saved_search.get_matching_profiles()
+    return (
+        profiles
+        .prefetch_related(None)
+        .annotate(search_id=models.Value(saved_search.pk, output_field=models.BigIntegerField()))
+        .values_list('search_id', 'id', 'user__username', 'headline')
+        .order_by()
+    )
+
+
+def find_match_rows(saved_searches, since_last_check=True):
+    """
+    Return (search_id, profile_id, username, headline) tuples for every profile
+    matching the given searches. The per-search queries are combined with
+    UNION so the whole evaluation costs one query per UNION_CHUNK_SIZE searches.
+    """
+    saved_searches = list(saved_searches)
+    rows = []
+    for start in range(0, len(saved_searches), UNION_CHUNK_SIZE):
+        chunk = saved_searches[start:start + UNION_CHUNK_SIZE]
+        queries = [_match_rows_query(search, since_last_check) for search in chunk]
+        combined = queries[0].union(*queries[1:]) if len(queries) > 1 else queries[0]
+        rows.extend(combined)
+    return rows
+
+
+def build_new_match_message(saved_search, profile_id, username, headline):
+    """Unsaved NEW_MATCH TalentMessage for a (search, profile) pair"""
+    return TalentMessage(
+        recruiter_id=saved_search.recruiter_id,
+        saved_search=saved_search,
+        profile_id=profile_id,
+        message_type=TalentMessage.MessageType.NEW_MATCH,
+        title=f'New match for "{saved_search.name}"',
+        content=(
+            f'{username or "Unknown User"} matches your saved search criteria. '
+            f'{"Headline: " + headline if headline else ""}'
+        ),
+    )
+
+
+def create_new_match_messages(saved_searches, since_last_check=True, mark_checked=True):
+    """
+    Create NEW_MATCH TalentMessages for every new (search, profile) pair and
+    return how many were created.
+    """
+    saved_searches = {search.pk: search for search in saved_searches}
+    if not saved_searches:
+        return 0
+
+    rows = find_match_rows(saved_searches.values(), since_last_check=since_last_check)
+    if not rows:
+        return 0
+
+    checked_search_ids = {row[0] for row in rows} if mark_checked else ()
+    return len(save_new_match_messages(saved_searches, rows, checked_search_ids=checked_search_ids))
+
+
+def save_new_match_messages(saved_searches, rows, checked_search_ids=(), checked_at=None):
+    """
+    Persist match rows produced by find_match_rows and return the new messages.
+
+    saved_searches maps search id to SavedSearch. Pairs that already have a
+    NEW_MATCH message are skipped, the remaining messages are bulk-inserted and
+    last_check is set with a single UPDATE for checked_search_ids.
+    """
+    existing_pairs = set(
+        TalentMessage.objects.filter(
+            saved_search_id__in=saved_searches.keys(),
+            message_type=TalentMessage.MessageType.NEW_MATCH,
+        ).values_list('saved_search_id', 'profile_id')
+    )
+
+    new_messages = []
+    for search_id, profile_id, username, headline in rows:
+        if (search_id, profile_id) in existing_pairs:
+            continue
+        existing_pairs.add((search_id, profile_id))
+        new_messages.append(
+            build_new_match_message(saved_searches[search_id], profile_id, username, headline)
+        )
+
+    # ignore_conflicts guards against a concurrent signal creating the same row
+    TalentMessage.objects.bulk_create(new_messages, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    # bulk_create skips post_save, so maintain the unread counters here
+    talent_messages_created(Counter(message.recruiter_id for message in new_messages))
+
+    if checked_search_ids:
+        SavedSearch.objects.filter(pk__in=checked_search_ids).update(last_check=checked_at or timezone.now())
+
+    return new_messages
+
+
+def backfill_saved_search(search_id, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Create NEW_MATCH TalentMessages for every profile currently matching a
+    saved search. Profiles are streamed with iterator() and handled one chunk
+    at a time so memory stays flat regardless of the size of the talent pool.
+    """
+    saved_search = SavedSearch.objects.filter(pk=search_id).prefetch_related('skills').first()
+    if saved_search is None:
+        return 0
+
+    rows = (
+        saved_search.get_matching_profiles()
+        .prefetch_related(None)
+        .values_list('id', 'user__username', 'headline')
+        .order_by()
+        .iterator(chunk_size=chunk_size)
+    )
+
+    created = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            created += _backfill_chunk(saved_search, chunk)
+            chunk = []
+    if chunk:
+        created += _backfill_chunk(saved_search, chunk)
+    return created
+
+
+def _backfill_chunk(saved_search, chunk):
+    existing_ids = set(
+        TalentMessage.objects.filter(
+            saved_search=saved_search,
+            message_type=TalentMessage.MessageType.NEW_MATCH,
+            profile_id__in=[profile_id for profile_id, _, _ in chunk],
+        ).values_list('profile_id', flat=True)
+    )
+    new_messages = [
+        build_new_match_message(saved_search, profile_id, username, headline)
+        for profile_id, username, headline in chunk
+        if profile_id not in existing_ids
+    ]
+    # A new search's existing matches are shown in the app, not sent in the next digest email
+    now = timezone.now()
+    for message in new_messages:
+        message.emailed_at = now
+    TalentMessage.objects.bulk_create(new_messages, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+    talent_messages_created({saved_search.recruiter_id: len(new_messages)})
+    return len(new_messages)
+
+
+def _run_backfill(search_id):
+    try:
+        backfill_saved_search(search_id)
+    except Exception:
+        logger.exception("Backfill failed for saved search %s", search_id)
+    finally:
+        # Background threads own their connection; don't leak it
+        connection.close()
+
+
+def schedule_backfill(saved_search):
+    """
+    Backfill matches for a new or edited saved search once the surrounding
+    transaction commits. Runs in a daemon thread unless
+    SAVED_SEARCH_BACKFILL_ASYNC is False (e.g. in tests), in which case the
+    backfill runs inline.
+    """
+    search_id = saved_search.pk
+
+    def start():
+        if getattr(settings, 'SAVED_SEARCH_BACKFILL_ASYNC', True):
+            threading.Thread(target=_run_backfill, args=(search_id,), daemon=True).start()
+        else:
+            backfill_saved_search(search_id)
+
+    transaction.on_commit(start)
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Q
+
+
+def populate_unread_counters(apps, schema_editor):
+    Conversation = apps.get_model('accounts', 'Conversation')
+    TalentMessage = apps.get_model('accounts', 'TalentMessage')
+    UnreadCounter = apps.get_model('accounts', 'UnreadCounter')
+
+    totals = {}
+    conversations = Conversation.objects.annotate(
+        recruiter_unread=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=F('recruiter'))),
+        candidate_unread=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=F('candidate'))),
+    ).filter(Q(recruiter_unread__gt=0) | Q(candidate_unread__gt=0))
+    for conversation in conversations:
+        Conversation.objects.filter(pk=conversation.pk).update(
+            recruiter_unread_count=conversation.recruiter_unread,
+            candidate_unread_count=conversation.candidate_unread,
+        )
+        for user_id, count in ((conversation.recruiter_id, conversation.recruiter_unread),
+                               (conversation.candidate_id, conversation.candidate_unread)):
+            totals.setdefault(user_id, [0, 0])[1] += count
+
+    talent = TalentMessage.objects.filter(message_type='new_match', is_read=False).values('recruiter_id').annotate(n=Count('id'))
+    for row in talent:
+        totals.setdefault(row['recruiter_id'], [0, 0])[0] += row['n']
+
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, talent_unread=t, message_unread=m) for user_id, (t, m) in totals.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_jobseekerprofile_show_bio_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='candidate_unread_count',
+            field=models.PositiveIntegerField(default=0, help_text='Unread messages sent to the candidate'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='recruiter_unread_count',
+            field=models.PositiveIntegerField(default=0, help_text='Unread messages sent to the recruiter'),
+        ),
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('talent_unread', models.PositiveIntegerField(default=0, help_text='Unread NEW_MATCH talent messages')),
+                ('message_unread', models.PositiveIntegerField(default=0, help_text='Unread conversation messages')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='unread_counter', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(populate_unread_counters, migrations.RunPython.noop),
+    ]
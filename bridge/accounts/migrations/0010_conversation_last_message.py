@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_last_message(apps, schema_editor):
+    Conversation = apps.get_model('accounts', 'Conversation')
+    Message = apps.get_model('accounts', 'Message')
+
+    for conversation in Conversation.objects.all().iterator(chunk_size=2000):
+        latest = Message.objects.filter(conversation_id=conversation.pk).order_by('-created_at', '-pk').first()
+        if latest is None:
+            continue
+        content = " ".join(latest.content.split())
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message_at=latest.created_at,
+            last_message_preview=content if len(content) <= 120 else content[:119] + "\u2026",
+            last_message_sender_id=latest.sender_id,
+            updated_at=latest.created_at,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_unread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(populate_last_message, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_conversation_last_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['recruiter', '-updated_at', '-id'], name='conv_recruiter_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['candidate', '-updated_at', '-id'], name='conv_candidate_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('recruiter_unread_count__gt', 0)), fields=['recruiter', '-updated_at', '-id'], name='conv_recruiter_unread_idx'),
+        ),
+    ]
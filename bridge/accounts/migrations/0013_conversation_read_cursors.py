@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:38
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Q
+
+
+def populate_read_cursors(apps, schema_editor):
+    """
+    Each participant's cursor becomes the newest message sent to them that was
+    marked read. Unread counters are then recomputed from the cursors, since any
+    older message still flagged unread is now considered read.
+    """
+    Conversation = apps.get_model('accounts', 'Conversation')
+    UnreadCounter = apps.get_model('accounts', 'UnreadCounter')
+
+    conversations = Conversation.objects.annotate(
+        recruiter_cursor=Max('messages__id', filter=Q(messages__is_read=True) & ~Q(messages__sender=F('recruiter'))),
+        candidate_cursor=Max('messages__id', filter=Q(messages__is_read=True) & ~Q(messages__sender=F('candidate'))),
+    ).filter(Q(recruiter_cursor__isnull=False) | Q(candidate_cursor__isnull=False))
+    for conversation in conversations.iterator(chunk_size=2000):
+        Conversation.objects.filter(pk=conversation.pk).update(
+            recruiter_last_read_message_id=conversation.recruiter_cursor or 0,
+            candidate_last_read_message_id=conversation.candidate_cursor or 0,
+        )
+
+    totals = {}
+    conversations = Conversation.objects.annotate(
+        recruiter_unread=Count('messages', filter=Q(messages__id__gt=F('recruiter_last_read_message_id')) & ~Q(messages__sender=F('recruiter'))),
+        candidate_unread=Count('messages', filter=Q(messages__id__gt=F('candidate_last_read_message_id')) & ~Q(messages__sender=F('candidate'))),
+    )
+    for conversation in conversations.iterator(chunk_size=2000):
+        Conversation.objects.filter(pk=conversation.pk).update(
+            recruiter_unread_count=conversation.recruiter_unread,
+            candidate_unread_count=conversation.candidate_unread,
+        )
+        for user_id, count in ((conversation.recruiter_id, conversation.recruiter_unread),
+                               (conversation.candidate_id, conversation.candidate_unread)):
+            totals[user_id] = totals.get(user_id, 0) + count
+
+    UnreadCounter.objects.update(message_unread=0)
+    for user_id, count in totals.items():
+        if count:
+            UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'message_unread': count})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='candidate_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='recruiter_last_read_message_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+    ]
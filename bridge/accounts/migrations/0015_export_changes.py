@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_existing_users(apps, schema_editor):
+    """Give every user a change time so incremental user exports start out complete"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    ExportChange = apps.get_model('accounts', 'ExportChange')
+    users = User.objects.order_by('pk').values_list('pk', 'date_joined', 'last_login')
+    batch = []
+    for user_id, date_joined, last_login in users.iterator(chunk_size=2000):
+        batch.append(ExportChange(export='users', object_id=user_id, changed_at=max(date_joined, last_login or date_joined)))
+        if len(batch) >= 2000:
+            ExportChange.objects.bulk_create(batch)
+            batch = []
+    ExportChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_export_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export', models.CharField(help_text='Name of the export in accounts.exports.EXPORTS', max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField()),
+                ('deleted', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['export', 'deleted', 'changed_at'], name='export_change_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('export', 'object_id'), name='export_change_record_uniq')],
+            },
+        ),
+        migrations.RunPython(record_existing_users, migrations.RunPython.noop),
+    ]
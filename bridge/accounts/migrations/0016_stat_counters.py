@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+# (counter, model, field also counted by) as in accounts.stats.COUNTED_TABLES
+COUNTED_TABLES = [
+    ('users', settings.AUTH_USER_MODEL, None),
+    ('profiles', 'accounts.JobSeekerProfile', None),
+    ('jobs', 'jobs.Job', 'moderation_status'),
+    ('applications', 'jobs.Application', None),
+    ('skills', 'jobs.Skill', None),
+    ('conversations', 'accounts.Conversation', None),
+    ('messages', 'accounts.Message', None),
+    ('saved_searches', 'accounts.SavedSearch', None),
+]
+
+
+def count_existing_rows(apps, schema_editor):
+    """Start the counters at the tables' current sizes"""
+    StatCounter = apps.get_model('accounts', 'StatCounter')
+    counters = []
+    for name, model_name, by in COUNTED_TABLES:
+        model = apps.get_model(*model_name.split('.'))
+        counters.append(StatCounter(key=name, count=model.objects.count()))
+        if by:
+            per_value = dict(model.objects.order_by().values_list(by).annotate(n=Count('*')))
+            for value, label in model._meta.get_field(by).choices:
+                counters.append(StatCounter(key=f'{name}.{value}', count=per_value.get(value, 0)))
+    StatCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_export_changes'),
+        ('jobs', '0008_job_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Table name, or table.value for a per-value count', max_length=64, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_existing_rows, migrations.RunPython.noop),
+    ]
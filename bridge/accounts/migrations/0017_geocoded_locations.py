@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_stat_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(help_text="Normalized location, e.g. 'atlanta, ga, usa'", max_length=255, unique=True)),
+                ('found', models.BooleanField(default=True, help_text='False caches a location the geocoder could not place')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('confidence', models.FloatField(blank=True, help_text="Geocoder's 0-1 score for the match, if it gives one", null=True)),
+                ('looked_up_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
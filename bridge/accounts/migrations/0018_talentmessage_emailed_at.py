@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:35
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_emailed(apps, schema_editor):
+    """Matches recorded before digests tracked this were already covered (or never will be)"""
+    TalentMessage = apps.get_model('accounts', 'TalentMessage')
+    TalentMessage.objects.update(emailed_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_geocoded_locations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talentmessage',
+            name='emailed_at',
+            field=models.DateTimeField(blank=True, help_text='When a digest email covered this match (also set for matches it skipped as already read)', null=True),
+        ),
+        migrations.RunPython(mark_existing_emailed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='talentmessage',
+            index=models.Index(condition=models.Q(('emailed_at__isnull', True)), fields=['recruiter'], name='talent_msg_unemailed_idx'),
+        ),
+    ]
@@ -111,9 +111,10 @@ class SavedSearch(models.Model):
                 | Q(github_url__icontains=self.query)
             )
         
-        # Apply skills filter
-        if self.skills.exists():
-            profiles = profiles.filter(skills__in=self.skills.all()).distinct()
+        # Apply skills filter (uses prefetched skills when available)
+        skill_ids = [skill.id for skill in self.skills.all()]
+        if skill_ids:
+            profiles = profiles.filter(skills__in=skill_ids).distinct()
         
         # Apply location filters
         if self.location_city:
@@ -165,10 +166,18 @@ class TalentMessage(models.Model):
     content = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    emailed_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When a digest email covered this match (also set for matches it skipped as already read)",
+    )
     
     class Meta:
         ordering = ['-created_at']
         unique_together = ['saved_search', 'profile', 'message_type']
+        indexes = [
+            # Partial index so the digest finds the matches it hasn't emailed yet
+            models.Index(fields=['recruiter'], condition=models.Q(emailed_at__isnull=True), name='talent_msg_unemailed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.recruiter.username}"
@@ -179,21 +188,75 @@ class Conversation(models.Model):
     candidate = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="candidate_conversations")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized unread counters, maintained with F() updates (see accounts.notifications)
+    recruiter_unread_count = models.PositiveIntegerField(default=0, help_text="Unread messages sent to the recruiter")
+    candidate_unread_count = models.PositiveIntegerField(default=0, help_text="Unread messages sent to the candidate")
+
+    # Read cursors: a participant has read every message with id <= their cursor
+    recruiter_last_read_message_id = models.PositiveBigIntegerField(default=0)
+    candidate_last_read_message_id = models.PositiveBigIntegerField(default=0)
+
+    # Latest message summary so lists never load message bodies
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=200, blank=True)
+    last_message_sender = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
     
     class Meta:
         unique_together = ['recruiter', 'candidate']
         ordering = ['-updated_at']
+        indexes = [
+            # Inbox pages are keyset scans on (participant, last activity)
+            models.Index(fields=['recruiter', '-updated_at', '-id'], name='conv_recruiter_activity_idx'),
+            models.Index(fields=['candidate', '-updated_at', '-id'], name='conv_candidate_activity_idx'),
+            # Partial index so the recruiter's unread-only filter skips read threads
+            models.Index(
+                fields=['recruiter', '-updated_at', '-id'],
+                condition=models.Q(recruiter_unread_count__gt=0),
+                name='conv_recruiter_unread_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"Conversation: {self.recruiter.username} <-> {self.candidate.username}"
     
     def get_latest_message(self):
         """Get the most recent message in this conversation"""
-        return self.messages.first()
+        return self.messages.last()
+
+    @staticmethod
+    def preview_for(content):
+        """Short single-line summary of a message body"""
+        content = " ".join(content.split())
+        return content if len(content) <= 120 else content[:119] + "…"
+
+    def refresh_last_message(self):
+        """Recompute the latest-message summary (e.g. after a message is deleted)"""
+        latest = self.messages.only('created_at', 'content', 'sender_id').last()
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message_at=latest.created_at if latest else None,
+            last_message_preview=Conversation.preview_for(latest.content) if latest else "",
+            last_message_sender_id=latest.sender_id if latest else None,
+        )
     
     def get_unread_count_for_user(self, user):
         """Get count of unread messages for a specific user (messages sent TO the user that are unread)"""
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        if user.pk == self.recruiter_id:
+            return self.recruiter_unread_count
+        if user.pk == self.candidate_id:
+            return self.candidate_unread_count
+        return 0
+
+    def unread_count_field(self, user_id):
+        """Name of the counter holding unread messages for the given participant"""
+        return 'recruiter_unread_count' if user_id == self.recruiter_id else 'candidate_unread_count'
+
+    def last_read_field(self, user_id):
+        """Name of the read cursor for the given participant"""
+        return 'recruiter_last_read_message_id' if user_id == self.recruiter_id else 'candidate_last_read_message_id'
+
+    def last_read_message_id_for(self, user_id):
+        return getattr(self, self.last_read_field(user_id))
 
 
 class Message(models.Model):
@@ -201,19 +264,139 @@ class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="messages")
     sender = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="sent_messages")
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Message history is paged newest-first by id within a conversation
+            models.Index(fields=['conversation', '-id'], name='message_conversation_page_idx'),
+        ]
     
     def __str__(self):
         return f"Message from {self.sender.username}: {self.content[:50]}..."
     
+    @property
+    def is_read(self):
+        """Whether the recipient's read cursor has reached this message"""
+        return self.pk <= self.conversation.last_read_message_id_for(self.recipient_id())
+
     def mark_as_read(self):
-        """Mark this message as read"""
-        self.is_read = True
-        self.save(update_fields=['is_read'])
+        """Mark this message, and everything before it, as read by the recipient"""
+        from .notifications import mark_conversation_read
+        mark_conversation_read(self.conversation, self.recipient_id(), self.pk)
+
+    def recipient_id(self):
+        """The participant this message was sent to"""
+        conversation = self.conversation
+        return conversation.candidate_id if self.sender_id == conversation.recruiter_id else conversation.recruiter_id
+
+
+class UnreadCounter(models.Model):
+    """Per-user unread totals so badges are a single-row read instead of COUNT queries"""
+    user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, related_name="unread_counter")
+    talent_unread = models.PositiveIntegerField(default=0, help_text="Unread NEW_MATCH talent messages")
+    message_unread = models.PositiveIntegerField(default=0, help_text="Unread conversation messages")
+
+    def __str__(self):
+        return f"UnreadCounter({self.user.username})"
+
+
+class StatCounter(models.Model):
+    """Row counts shown on the admin dashboards, so they are read instead of counted (see accounts.stats)"""
+    key = models.CharField(max_length=64, unique=True, help_text="Table name, or table.value for a per-value count")
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"StatCounter({self.key}={self.count})"
+
+
+class GeocodedLocation(models.Model):
+    """Cached geocoder answer for a normalized location string (see accounts.geocoding)"""
+    query = models.CharField(max_length=255, unique=True, help_text="Normalized location, e.g. 'atlanta, ga, usa'")
+    found = models.BooleanField(default=True, help_text="False caches a location the geocoder could not place")
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    confidence = models.FloatField(null=True, blank=True, help_text="Geocoder's 0-1 score for the match, if it gives one")
+    looked_up_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"GeocodedLocation({self.query})"
+
+
+class ExportJob(models.Model):
+    """An admin data export written to a gzip file in the background (see accounts.export_jobs)"""
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        NDJSON = "ndjson", "NDJSON"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    requested_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, related_name="export_jobs")
+    export = models.CharField(max_length=50, help_text="Name of the export in accounts.exports.EXPORTS")
+    format = models.CharField(max_length=10, choices=Format.choices, default=Format.CSV)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    # Progress, written by the worker every few seconds
+    rows_written = models.PositiveBigIntegerField(default=0)
+    rows_total = models.PositiveBigIntegerField(null=True, blank=True, help_text="Row count taken when the job started")
+    rows_per_second = models.FloatField(null=True, blank=True)
+    progress_at = models.DateTimeField(null=True, blank=True, help_text="Last progress update (a stale value means the worker died)")
+
+    file_name = models.CharField(max_length=200, blank=True, help_text="File under EXPORT_JOBS_DIR once done")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker polls for the oldest pending jobs
+            models.Index(fields=['status', 'created_at'], name='export_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"ExportJob({self.export}.{self.format}, {self.status})"
+
+    @property
+    def percent_done(self):
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.rows_total))
 
 
 # Create your models here.
+
+
+class ExportChange(models.Model):
+    """
+    Latest change of an exported row that incremental exports can't see in
+    the row itself: deletions (tombstones) for every export, and saves for
+    tables without an updated_at column of their own (auth users). One row
+    per exported record, upserted by signals (see accounts.exports).
+    """
+    export = models.CharField(max_length=50, help_text="Name of the export in accounts.exports.EXPORTS")
+    object_id = models.BigIntegerField()
+    changed_at = models.DateTimeField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['export', 'object_id'], name='export_change_record_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['export', 'deleted', 'changed_at'], name='export_change_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"ExportChange({self.export} #{self.object_id}{', deleted' if self.deleted else ''})"
@@ -0,0 +1,269 @@
+"""
+In-process pub/sub for unread-count changes.
+
+Model signals and views publish "the unread count of user X changed" after the
+surrounding transaction commits. Subscribers are either asyncio queues (the SSE
+stream served under ASGI) or threads blocked in wait() (the long-polling
+fallback used under WSGI). Every event bumps a per-user version so pollers can
+tell whether they missed an update.
+
+Unread totals themselves are denormalized: UnreadCounter holds per-user totals
+and Conversation holds per-participant counts. They are adjusted with F()
+expressions wherever messages are created, read or deleted, and
+reconcile_unread_counters() repairs any drift. A conversation message is read
+once its id is at or below the recipient's read cursor on the Conversation.
+
+The broker lives in process memory: with several server processes an update is
+only pushed to clients connected to the process that made the change. Streams
+and long polls therefore also resync on a timeout.
+"""
+import threading
+import uuid
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from .exports import record_export_changes
+from .models import Conversation, TalentMessage, UnreadCounter
+from .realtime import conversation_read
+
+
+class UnreadCountBroker:
+    def __init__(self):
+        # Identifies this process so pollers can detect a version from another one
+        self.token = uuid.uuid4().hex[:12]
+        self._condition = threading.Condition()
+        self._versions = defaultdict(int)
+        self._subscribers = defaultdict(set)
+
+    def version(self, user_id):
+        with self._condition:
+            return f"{self.token}:{self._versions[user_id]}"
+
+    def publish(self, user_id):
+        with self._condition:
+            self._versions[user_id] += 1
+            subscribers = list(self._subscribers.get(user_id, ()))
+            self._condition.notify_all()
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, user_id)
+
+    def subscribe(self, user_id, loop, queue):
+        with self._condition:
+            self._subscribers[user_id].add((loop, queue))
+
+    def unsubscribe(self, user_id, loop, queue):
+        with self._condition:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard((loop, queue))
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def wait(self, user_id, since, timeout):
+        """
+        Block until the user's version differs from `since` or `timeout` seconds
+        pass, and return the current version. A version issued by another
+        process cannot be compared, so it only waits for a local change.
+        """
+        with self._condition:
+            current = f"{self.token}:{self._versions[user_id]}"
+            if since and since.split(':')[0] == self.token and since != current:
+                return current
+            self._condition.wait_for(
+                lambda: f"{self.token}:{self._versions[user_id]}" != current,
+                timeout=timeout,
+            )
+            return f"{self.token}:{self._versions[user_id]}"
+
+
+broker = UnreadCountBroker()
+
+
+def notify_unread_changed(*user_ids):
+    """Publish an unread-count change for each user once the transaction commits"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+
+    def publish():
+        for user_id in user_ids:
+            broker.publish(user_id)
+
+    if user_ids:
+        transaction.on_commit(publish)
+
+
+def _adjust(queryset, field, delta):
+    """Add delta to a counter column in SQL, never letting it drop below zero"""
+    value = F(field) + delta if delta >= 0 else Greatest(F(field) + delta, 0)
+    return queryset.update(**{field: value})
+
+
+def _adjust_user_counter(user_id, field, delta):
+    if _adjust(UnreadCounter.objects.filter(user_id=user_id), field, delta) or delta <= 0:
+        return
+    # First unread item for this user: create the row, then apply the delta
+    UnreadCounter.objects.get_or_create(user_id=user_id)
+    _adjust(UnreadCounter.objects.filter(user_id=user_id), field, delta)
+
+
+def message_created(message):
+    """
+    Count a new conversation message as unread for its recipient and record it
+    as the conversation's latest message, in one UPDATE of the conversation.
+    A message committed after a newer one (concurrent sends) is only counted,
+    so the summary never goes back to an older message.
+    """
+    conversation = message.conversation
+    recipient_id = message.recipient_id()
+    unread_field = conversation.unread_count_field(recipient_id)
+    updated = Conversation.objects.filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at), pk=conversation.pk,
+    ).update(**{
+        unread_field: F(unread_field) + 1,
+        'last_message_at': message.created_at,
+        'last_message_preview': Conversation.preview_for(message.content),
+        'last_message_sender_id': message.sender_id,
+        # Sending a message is activity: keeps ordering by updated_at meaningful
+        'updated_at': message.created_at,
+    })
+    if not updated:
+        Conversation.objects.filter(pk=conversation.pk).update(**{unread_field: F(unread_field) + 1})
+    _adjust_user_counter(recipient_id, 'message_unread', 1)
+    notify_unread_changed(recipient_id)
+
+
+def mark_conversation_read(conversation, reader_id, up_to_id):
+    """
+    Advance the reader's read cursor to message `up_to_id` and return how many
+    messages that marked read. The cursor never moves backwards, so the marked
+    messages are a range query over (old cursor, up_to_id] on the message id
+    index; they are logged for incremental message exports.
+    """
+    cursor_field = conversation.last_read_field(reader_id)
+    if up_to_id <= getattr(conversation, cursor_field):
+        # Already read as far as the loaded row knows: no queries at all
+        return 0
+    with transaction.atomic():
+        current = (
+            Conversation.objects.select_for_update().filter(pk=conversation.pk)
+            .values_list(cursor_field, flat=True).order_by().first()
+        )
+        if current is None or up_to_id <= current:
+            return 0
+        marked_ids = list(
+            conversation.messages.filter(pk__gt=current, pk__lte=up_to_id)
+            .exclude(sender_id=reader_id).order_by().values_list('pk', flat=True)
+        )
+        marked = len(marked_ids)
+        unread_field = conversation.unread_count_field(reader_id)
+        Conversation.objects.filter(pk=conversation.pk).update(**{
+            cursor_field: up_to_id,
+            unread_field: Greatest(F(unread_field) - marked, 0),
+        })
+        if marked:
+            _adjust_user_counter(reader_id, 'message_unread', -marked)
+            notify_unread_changed(reader_id)
+            # Their "Is Read" export column changed without the rows changing
+            record_export_changes('messages', marked_ids)
+        conversation_read(conversation.pk, reader_id, up_to_id)
+    setattr(conversation, cursor_field, up_to_id)
+    return marked
+
+
+def unread_messages_removed(conversation, user_id, count):
+    """Subtract `count` unread messages of `user_id` that no longer exist"""
+    if not count:
+        return
+    _adjust(Conversation.objects.filter(pk=conversation.pk), conversation.unread_count_field(user_id), -count)
+    _adjust_user_counter(user_id, 'message_unread', -count)
+    notify_unread_changed(user_id)
+
+
+def talent_messages_created(counts_by_recruiter):
+    """Add unread NEW_MATCH talent messages, given as {recruiter_id: count}"""
+    for recruiter_id, count in counts_by_recruiter.items():
+        if count:
+            _adjust_user_counter(recruiter_id, 'talent_unread', count)
+    notify_unread_changed(*counts_by_recruiter.keys())
+
+
+def talent_messages_marked_read(recruiter_id, count):
+    """Subtract `count` NEW_MATCH talent messages just marked read"""
+    if not count:
+        return
+    _adjust_user_counter(recruiter_id, 'talent_unread', -count)
+    notify_unread_changed(recruiter_id)
+
+
+def get_unread_counts(user):
+    """Unread talent-match notifications and conversation messages for a user"""
+    counter = UnreadCounter.objects.filter(user=user).values('talent_unread', 'message_unread').first() or {}
+    talent_unread = counter.get('talent_unread', 0)
+    message_unread = counter.get('message_unread', 0)
+    return {
+        'unread_count': talent_unread + message_unread,
+        'talent_unread_count': talent_unread,
+        'message_unread_count': message_unread,
+    }
+
+
+def reconcile_unread_counters():
+    """
+    Recompute every unread counter from the message tables and fix rows that
+    drifted. Returns (conversations repaired, user counters repaired).
+    """
+    conversations = Conversation.objects.annotate(
+        actual_recruiter_unread=Count(
+            'messages',
+            filter=Q(messages__id__gt=F('recruiter_last_read_message_id')) & ~Q(messages__sender=F('recruiter')),
+        ),
+        actual_candidate_unread=Count(
+            'messages',
+            filter=Q(messages__id__gt=F('candidate_last_read_message_id')) & ~Q(messages__sender=F('candidate')),
+        ),
+    ).order_by()
+
+    message_unread = {}
+    drifted_conversations = []
+    for conversation in conversations.iterator(chunk_size=2000):
+        for user_id, actual in (
+            (conversation.recruiter_id, conversation.actual_recruiter_unread),
+            (conversation.candidate_id, conversation.actual_candidate_unread),
+        ):
+            message_unread[user_id] = message_unread.get(user_id, 0) + actual
+        if (conversation.recruiter_unread_count, conversation.candidate_unread_count) != (
+            conversation.actual_recruiter_unread, conversation.actual_candidate_unread,
+        ):
+            conversation.recruiter_unread_count = conversation.actual_recruiter_unread
+            conversation.candidate_unread_count = conversation.actual_candidate_unread
+            drifted_conversations.append(conversation)
+    Conversation.objects.bulk_update(
+        drifted_conversations, ['recruiter_unread_count', 'candidate_unread_count'], batch_size=500,
+    )
+
+    talent_unread = dict(
+        TalentMessage.objects.filter(
+            message_type=TalentMessage.MessageType.NEW_MATCH, is_read=False,
+        ).values('recruiter_id').annotate(n=Count('id')).values_list('recruiter_id', 'n').order_by()
+    )
+
+    existing = {counter.user_id: counter for counter in UnreadCounter.objects.all()}
+    drifted_counters = []
+    missing_counters = []
+    for user_id in set(existing) | set(message_unread) | set(talent_unread):
+        expected = (talent_unread.get(user_id, 0), message_unread.get(user_id, 0))
+        counter = existing.get(user_id)
+        if counter is None:
+            if any(expected):
+                missing_counters.append(UnreadCounter(user_id=user_id, talent_unread=expected[0], message_unread=expected[1]))
+        elif (counter.talent_unread, counter.message_unread) != expected:
+            counter.talent_unread, counter.message_unread = expected
+            drifted_counters.append(counter)
+    UnreadCounter.objects.bulk_update(drifted_counters, ['talent_unread', 'message_unread'], batch_size=500)
+    UnreadCounter.objects.bulk_create(missing_counters, batch_size=500, ignore_conflicts=True)
+
+    repaired_users = [counter.user_id for counter in drifted_counters + missing_counters]
+    notify_unread_changed(*repaired_users)
+    return len(drifted_conversations), len(repaired_users)
@@ -0,0 +1,212 @@
+"""
+Real-time conversation delivery over ASGI WebSockets.
+
+Each open conversation page holds a WebSocket at /ws/conversations/<id>/
+(routed by bridge.asgi). New messages and read-cursor moves are published to
+a broker after the surrounding transaction commits, and every socket
+subscribed to that conversation forwards them to the browser.
+
+The broker is pluggable through settings.MESSAGE_BROKER_BACKEND. The default
+InMemoryMessageBroker only reaches sockets held by the same process; a
+multi-process deployment needs a backend that relays events between
+processes (e.g. over Redis pub/sub) implementing the same three methods.
+"""
+import asyncio
+import json
+import re
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import transaction
+from django.db.models import Q
+from django.http.request import validate_host
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+from django.utils.module_loading import import_string
+
+from .models import Conversation
+
+DEFAULT_BROKER_BACKEND = 'accounts.realtime.InMemoryMessageBroker'
+CONVERSATION_SOCKET_PATH = re.compile(r'^/ws/conversations/(?P<conversation_id>\d+)/$')
+
+# WebSocket close codes (4000-4999 are reserved for applications)
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+
+
+class BaseMessageBroker(ABC):
+    """Interface for conversation event brokers"""
+
+    @abstractmethod
+    def subscribe(self, conversation_id, loop, queue):
+        """Deliver events for the conversation to `queue`, owned by event loop `loop`"""
+
+    @abstractmethod
+    def unsubscribe(self, conversation_id, loop, queue):
+        """Stop delivering the conversation's events to `queue`"""
+
+    @abstractmethod
+    def publish(self, conversation_id, text):
+        """Send an already JSON-encoded event to every subscriber; callable from any thread"""
+
+
+class InMemoryMessageBroker(BaseMessageBroker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, conversation_id, loop, queue):
+        with self._lock:
+            self._subscribers.setdefault(conversation_id, set()).add((loop, queue))
+
+    def unsubscribe(self, conversation_id, loop, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(conversation_id)
+            if subscribers:
+                subscribers.discard((loop, queue))
+                if not subscribers:
+                    del self._subscribers[conversation_id]
+
+    def publish(self, conversation_id, text):
+        with self._lock:
+            subscribers = list(self._subscribers.get(conversation_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, text)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'MESSAGE_BROKER_BACKEND', DEFAULT_BROKER_BACKEND))()
+
+
+def message_payload(message):
+    """JSON-ready representation of a message, shared by pushes and the history API"""
+    return {
+        'id': message.pk,
+        'sender_id': message.sender_id,
+        'content': message.content,
+        'is_read': message.is_read,
+        'created_at': message.created_at.isoformat(),
+        'created_at_display': date_format(timezone.localtime(message.created_at), "M j, Y g:i A"),
+    }
+
+
+def publish_event(conversation_id, event):
+    """Encode the event once and publish it when the transaction commits"""
+    text = json.dumps(event)
+    transaction.on_commit(lambda: get_broker().publish(conversation_id, text))
+
+
+def message_posted(message):
+    publish_event(message.conversation_id, {'type': 'message', 'message': message_payload(message)})
+
+
+def conversation_read(conversation_id, reader_id, up_to_id):
+    publish_event(conversation_id, {'type': 'read', 'reader_id': reader_id, 'up_to_id': up_to_id})
+
+
+# WebSocket endpoint
+
+def _header(scope, name):
+    for key, value in scope.get('headers', ()):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _origin_allowed(scope):
+    """Reject cross-site sockets: browsers send the session cookie along with them"""
+    origin = _header(scope, b'origin')
+    if origin is None:
+        # Not a browser
+        return True
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    return validate_host(urlsplit(origin).hostname or '', allowed_hosts)
+
+
+def _participant_id(scope, conversation_id):
+    """The authenticated user's id if they take part in the conversation, else None"""
+    cookie = SimpleCookie(_header(scope, b'cookie') or '')
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    user = get_user(SimpleNamespace(session=session))
+    if not user.is_authenticated:
+        return None
+    is_participant = Conversation.objects.filter(
+        Q(recruiter=user) | Q(candidate=user), pk=conversation_id,
+    ).exists()
+    return user.pk if is_participant else None
+
+
+def _mark_read(conversation_id, user_id, message_id):
+    """Advance the user's read cursor to a message pushed to their open socket"""
+    from .notifications import mark_conversation_read
+
+    conversation = Conversation.objects.filter(pk=conversation_id).first()
+    # Only ids of real messages in this conversation may move the cursor
+    if conversation is not None and conversation.messages.filter(pk=message_id).exists():
+        mark_conversation_read(conversation, user_id, message_id)
+
+
+async def _handle_client_event(conversation_id, user_id, text):
+    try:
+        event = json.loads(text or '')
+        message_id = int(event['message_id']) if event.get('type') == 'read' else None
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return
+    if message_id is not None:
+        await sync_to_async(_mark_read)(conversation_id, user_id, message_id)
+
+
+async def conversation_socket(scope, receive, send):
+    """ASGI application for /ws/conversations/<id>/"""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+
+    match = CONVERSATION_SOCKET_PATH.match(scope['path'])
+    if not match:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    conversation_id = int(match['conversation_id'])
+    user_id = await sync_to_async(_participant_id)(scope, conversation_id) if _origin_allowed(scope) else None
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+    await send({'type': 'websocket.accept'})
+
+    broker = get_broker()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    broker.subscribe(conversation_id, loop, queue)
+    receive_task = asyncio.ensure_future(receive())
+    publish_task = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receive_task, publish_task}, return_when=asyncio.FIRST_COMPLETED)
+            if publish_task in done:
+                await send({'type': 'websocket.send', 'text': publish_task.result()})
+                publish_task = asyncio.ensure_future(queue.get())
+            if receive_task in done:
+                event = receive_task.result()
+                if event['type'] == 'websocket.disconnect':
+                    break
+                if event['type'] == 'websocket.receive':
+                    await _handle_client_event(conversation_id, user_id, event.get('text'))
+                receive_task = asyncio.ensure_future(receive())
+    finally:
+        broker.unsubscribe(conversation_id, loop, queue)
+        receive_task.cancel()
+        publish_task.cancel()
@@ -1,8 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import JobSeekerProfile, SavedSearch, TalentMessage
+from .models import JobSeekerProfile, SavedSearch, TalentMessage, Conversation, Message
+from .notifications import (
+    message_created,
+    talent_messages_created,
+    talent_messages_marked_read,
+    unread_messages_removed,
+)
+from .realtime import message_posted
+from .exports import EXPORTS, record_export_change
+from .stats import COUNTED_BY_MODEL, adjust_stat_counters
 
 
 @receiver(post_save, sender=get_user_model())
@@ -11,6 +21,86 @@ def create_profile_for_new_user(sender, instance, created, **kwargs):
         JobSeekerProfile.objects.get_or_create(user=instance)
 
 
+def record_export_save(sender, instance, **kwargs):
+    """Note the save for incremental exports of tables without an updated_at column"""
+    record_export_change(_EXPORT_NAMES[sender], instance.pk)
+
+
+def record_export_deletion(sender, instance, **kwargs):
+    """Tombstone for incremental exports"""
+    record_export_change(_EXPORT_NAMES[sender], instance.pk, deleted=True)
+
+
+def record_export_relation_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump updated_at of the rows whose exported many-to-many column changed,
+    since adding or removing links never saves the row itself
+    """
+    owner_model, field = _EXPORTED_RELATIONS[sender]
+    if not reverse:
+        owner_ids = [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else ()
+    elif action in ('post_add', 'post_remove'):
+        owner_ids = pk_set
+    elif action == 'pre_clear':
+        # After the clear the links (and so the owners) are gone
+        owner_ids = list(
+            sender.objects.filter(**{field.m2m_reverse_field_name(): instance})
+            .values_list(f'{field.m2m_field_name()}_id', flat=True)
+        )
+    else:
+        owner_ids = ()
+    if owner_ids:
+        owner_model.objects.filter(pk__in=owner_ids).update(updated_at=timezone.now())
+
+
+_EXPORT_NAMES = {export.queryset.model: export.name for export in EXPORTS.values()}
+_EXPORTED_RELATIONS = {}
+for export in EXPORTS.values():
+    model = export.queryset.model
+    post_delete.connect(record_export_deletion, sender=model, dispatch_uid=f'export-deletion-{export.name}')
+    if export.track_changes:
+        post_save.connect(record_export_save, sender=model, dispatch_uid=f'export-save-{export.name}')
+    if export.changed_at is not None:
+        for column in export.columns:
+            if column.many:
+                field = model._meta.get_field(column.source)
+                through = field.remote_field.through
+                _EXPORTED_RELATIONS[through] = (model, field)
+                m2m_changed.connect(
+                    record_export_relation_change, sender=through, dispatch_uid=f'export-relation-{export.name}-{column.source}',
+                )
+
+
+def remember_counted_value(sender, instance, update_fields=None, **kwargs):
+    """Before an update, note the stored value of the field a table is also counted by"""
+    table = COUNTED_BY_MODEL[sender]
+    if instance._state.adding or (update_fields is not None and table.by not in update_fields):
+        return
+    instance._stat_counted_value = sender.objects.filter(pk=instance.pk).values_list(table.by, flat=True).first()
+
+
+def count_saved_row(sender, instance, created, **kwargs):
+    table = COUNTED_BY_MODEL[sender]
+    if created:
+        adjust_stat_counters({key: 1 for key in table.keys_of(instance)})
+        return
+    before = instance.__dict__.pop('_stat_counted_value', None)
+    after = getattr(instance, table.by) if table.by else None
+    if before is not None and before != after:
+        adjust_stat_counters({table.key_for(before): -1, table.key_for(after): 1})
+
+
+def uncount_deleted_row(sender, instance, **kwargs):
+    adjust_stat_counters({key: -1 for key in COUNTED_BY_MODEL[sender].keys_of(instance)})
+
+
+for model, table in COUNTED_BY_MODEL.items():
+    post_save.connect(count_saved_row, sender=model, dispatch_uid=f'stat-count-save-{table.name}')
+    post_delete.connect(uncount_deleted_row, sender=model, dispatch_uid=f'stat-count-deletion-{table.name}')
+    if table.by:
+        pre_save.connect(remember_counted_value, sender=model, dispatch_uid=f'stat-count-before-{table.name}')
+
+
 @receiver(post_save, sender=JobSeekerProfile)
 def check_saved_searches_on_profile_update(sender, instance, created, **kwargs):
     """
@@ -101,6 +191,40 @@ def check_saved_searches_on_skills_change(sender, instance, action, **kwargs):
             )
 
 
+@receiver(post_save, sender=TalentMessage)
+def count_new_talent_message(sender, instance, created, **kwargs):
+    """Keep the recruiter's unread counter in step with new NEW_MATCH messages"""
+    if created and not instance.is_read and instance.message_type == TalentMessage.MessageType.NEW_MATCH:
+        talent_messages_created({instance.recruiter_id: 1})
+
+
+@receiver(post_delete, sender=TalentMessage)
+def uncount_deleted_talent_message(sender, instance, **kwargs):
+    if not instance.is_read and instance.message_type == TalentMessage.MessageType.NEW_MATCH:
+        talent_messages_marked_read(instance.recruiter_id, 1)
+
+
+@receiver(post_save, sender=Message)
+def record_new_message(sender, instance, created, **kwargs):
+    """Update the conversation summary and unread counts, then push the message to open sockets"""
+    if created:
+        message_created(instance)
+        message_posted(instance)
+
+
+@receiver(post_delete, sender=Message)
+def uncount_deleted_message(sender, instance, **kwargs):
+    conversation = Conversation.objects.filter(pk=instance.conversation_id).first()
+    if conversation is None:
+        # The whole conversation is being deleted
+        return
+    instance.conversation = conversation
+    if not instance.is_read:
+        unread_messages_removed(conversation, instance.recipient_id(), 1)
+    if conversation.last_message_at == instance.created_at:
+        conversation.refresh_last_message()
+
+
 def profile_matches_search(profile, saved_search):
     """
     Helper function to check if a profile matches a saved search criteria.
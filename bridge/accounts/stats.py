@@ -0,0 +1,117 @@
+"""
+Row counts for the admin dashboards.
+
+Every table in COUNTED_TABLES has a StatCounter row, plus one per value of
+its `by` field where it has one (jobs.pending, jobs.flagged, ...). Signals
+adjust them with F() updates as rows are created, deleted or change that
+field, so reading every count is one query over a handful of rows however large
+the tables grow. The counts are cached between changes; every adjustment
+drops the cached copy (again once its transaction commits), so dashboards
+never show counts older than the last change.
+
+bulk_create() and QuerySet.update() skip the signals: code using them calls
+adjust_stat_counters() itself, and reconcile_stat_counters() recounts the
+tables to repair any drift.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import JobSeekerProfile, SavedSearch, Conversation, Message, StatCounter
+from jobs.models import Skill, Job, Application
+
+
+# Seconds cached counts live; a backstop, as every adjustment drops them
+STAT_COUNTS_CACHE_TIMEOUT = 30
+STAT_COUNTS_CACHE_KEY = 'stat-counts'
+
+
+class CountedTable:
+    """A model whose rows are counted as `name`, and per value of `by` if given"""
+
+    def __init__(self, name, model, by=None):
+        self.name = name
+        self.model = model
+        self.by = by
+
+    def key_for(self, value):
+        return f'{self.name}.{value}'
+
+    def keys_of(self, instance):
+        """Counters a row adds to"""
+        if self.by is None:
+            return [self.name]
+        return [self.name, self.key_for(getattr(instance, self.by))]
+
+    def actual_counts(self):
+        """The counters' true values, counted from the table"""
+        if self.by is None:
+            return {self.name: self.model.objects.count()}
+        counts = {
+            self.key_for(value): 0
+            for value, label in self.model._meta.get_field(self.by).choices
+        }
+        per_value = self.model.objects.order_by().values_list(self.by).annotate(n=Count('*'))
+        for value, n in per_value:
+            counts[self.key_for(value)] = n
+        counts[self.name] = sum(counts.values())
+        return counts
+
+
+COUNTED_TABLES = [
+    CountedTable('users', get_user_model()),
+    CountedTable('profiles', JobSeekerProfile),
+    CountedTable('jobs', Job, by='moderation_status'),
+    CountedTable('applications', Application),
+    CountedTable('skills', Skill),
+    CountedTable('conversations', Conversation),
+    CountedTable('messages', Message),
+    CountedTable('saved_searches', SavedSearch),
+]
+COUNTED_BY_MODEL = {table.model: table for table in COUNTED_TABLES}
+
+
+def adjust_stat_counters(deltas):
+    """Add each of `deltas` ({key: change}) to its counter; one UPDATE per distinct change"""
+    keys_by_delta = {}
+    for key, delta in deltas.items():
+        if delta:
+            keys_by_delta.setdefault(delta, []).append(key)
+    for delta, keys in keys_by_delta.items():
+        StatCounter.objects.filter(key__in=keys).update(count=F('count') + delta)
+    if keys_by_delta:
+        # Dropped now for this connection and again on commit, so no other reader re-caches the old counts
+        cache.delete(STAT_COUNTS_CACHE_KEY)
+        transaction.on_commit(lambda: cache.delete(STAT_COUNTS_CACHE_KEY))
+
+
+def stat_counts():
+    """Every counter by key (missing ones read as 0)"""
+    counts = cache.get(STAT_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = dict(StatCounter.objects.values_list('key', 'count'))
+        cache.set(STAT_COUNTS_CACHE_KEY, counts, STAT_COUNTS_CACHE_TIMEOUT)
+    return Counter(counts)
+
+
+def reconcile_stat_counters():
+    """Recount every counted table and fix counters that drifted; returns how many were repaired"""
+    actual = {}
+    for table in COUNTED_TABLES:
+        actual.update(table.actual_counts())
+
+    existing = {counter.key: counter for counter in StatCounter.objects.filter(key__in=actual)}
+    drifted = []
+    for key, count in actual.items():
+        counter = existing.get(key)
+        if counter is not None and counter.count != count:
+            counter.count = count
+            drifted.append(counter)
+    StatCounter.objects.bulk_update(drifted, ['count'])
+    missing = [StatCounter(key=key, count=count) for key, count in actual.items() if key not in existing]
+    StatCounter.objects.bulk_create(missing, ignore_conflicts=True)
+    cache.delete(STAT_COUNTS_CACHE_KEY)
+    return len(drifted) + len(missing)
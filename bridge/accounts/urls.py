@@ -20,12 +20,15 @@ urlpatterns = [
     path("talent/messages/", views.talent_messages, name="talent_messages"),
     path("talent/check-matches/", views.check_new_matches, name="check_new_matches"),
     path("talent/unread-count/", views.get_unread_messages_count, name="unread_messages_count"),
+    path("talent/unread-stream/", views.unread_messages_stream, name="unread_messages_stream"),
+    path("talent/notifications/", views.talent_notifications, name="talent_notifications"),
     
     # Messaging URLs
     path("messages/", views.conversations_list, name="conversations_list"),
     path("messages/<int:conversation_id>/", views.conversation_detail, name="conversation_detail"),
     path("messages/start/<int:candidate_id>/", views.start_conversation, name="start_conversation"),
     path("messages/<int:conversation_id>/send/", views.send_message, name="send_message"),
+    path("messages/<int:conversation_id>/history/", views.conversation_messages_api, name="conversation_messages_api"),
     
     # Admin Export URLs
     path("admin/export/", views.admin_export_dashboard, name="admin_export_dashboard"),
@@ -37,6 +40,11 @@ urlpatterns = [
     path("admin/export/conversations/", views.export_conversations, name="admin_export_conversations"),
     path("admin/export/messages/", views.export_messages, name="admin_export_messages"),
     path("admin/export/saved-searches/", views.export_saved_searches, name="admin_export_saved_searches"),
+    path("admin/export/snapshot/", views.export_snapshot, name="admin_export_snapshot"),
+    path("admin/export/deleted/<str:export>/", views.export_deletions, name="admin_export_deletions"),
+    path("admin/export/background/", views.enqueue_export_job, name="enqueue_export_job"),
+    path("admin/export/background/<int:job_id>/", views.export_job_status, name="export_job_status"),
+    path("admin/export/background/<int:job_id>/download/", views.download_export_job, name="download_export_job"),
     path("api/applicant-map-data/", views.applicant_map_data_api, name="applicant_map_data_api"), # New API for applicant map data
 ]
 
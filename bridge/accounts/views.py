@@ -3,22 +3,67 @@ from django.contrib.auth import get_user_model, login
 from django.shortcuts import redirect, render, get_object_or_404
 from django.forms import ModelForm, Form, CharField, EmailField, ChoiceField, PasswordInput
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Avg, Count, FloatField, Value
+from django.db.models.functions import Cast, Floor
 from django.contrib import messages
 from django.urls import reverse
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.http import require_POST
 from django.utils import timezone
-import csv
-from datetime import datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.core.cache import cache
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-from .models import JobSeekerProfile, SavedSearch, TalentMessage, Conversation, Message
+from asgiref.sync import sync_to_async
+
+from .models import JobSeekerProfile, SavedSearch, TalentMessage, Conversation, ExportJob
 from .forms import SavedSearchForm, JobSeekerProfileForm, MessageForm, UserProfileForm # Added UserProfileForm
+from .matching import create_new_match_messages, schedule_backfill
+from .realtime import message_payload
+from .exports import EXPORTS
+from .export_jobs import export_job_path, recover_export_jobs, schedule_export_job
+from .export_snapshot import Snapshot
+from .stats import stat_counts
+from .notifications import (
+    broker,
+    get_unread_counts,
+    mark_conversation_read,
+    talent_messages_marked_read,
+)
 from jobs.models import Skill, Job, Application
 from jobs.decorators import recruiter_required, admin_required
 from django.db import models # Added for models.Prefetch
 
 
+# Seconds a long-poll request waits for an unread-count change
+UNREAD_LONG_POLL_TIMEOUT = 25
+# Seconds between recounts on an idle SSE stream (covers multi-process deployments)
+UNREAD_STREAM_RESYNC = 30
+# Conversations per page of the inbox
+CONVERSATIONS_PAGE_SIZE = 25
+# Profiles shown in the lazily loaded talent match section
+TALENT_NOTIFICATIONS_LIMIT = 50
+# Messages rendered with a conversation and returned per history request
+MESSAGES_PAGE_SIZE = 50
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Applicant map: clusters below this zoom level, individual profiles from it on
+MAP_CLUSTER_MAX_ZOOM = 11
+# Cluster grid cells along one map tile edge
+MAP_CELLS_PER_TILE = 4
+MAP_POINT_LIMIT = 5000
+# Seconds a recruiter's map response is reused
+MAP_DATA_CACHE_TIMEOUT = 60
+# Stand-in profile id for building the profile URL template
+MAP_URL_PLACEHOLDER = 987654321
+# Recent background export jobs listed on the export dashboard
+EXPORT_JOBS_LISTED = 20
+# Bytes read from disk per chunk of an export download
+EXPORT_DOWNLOAD_BLOCK_SIZE = 64 * 1024
 
 
 @login_required
@@ -275,7 +320,9 @@ def save_search(request):
     unique_skills = list(set(all_skill_objects))
     saved_search.skills.set(unique_skills)
 
-    
+    # Generate matches for existing profiles without blocking the request
+    schedule_backfill(saved_search)
+
     return JsonResponse({
         'success': True, 
         'message': f'Search "{name}" saved successfully!',
@@ -283,19 +330,9 @@ def save_search(request):
     })
 
 
-@recruiter_required
-def applicant_map_data_api(request):
-    """API endpoint to provide applicant location data for mapping on the applications page."""
-    # Start with all job seeker profiles that have location data and are visible
-    profiles_query = JobSeekerProfile.objects.filter(
-        latitude__isnull=False,
-        longitude__isnull=False,
-        account_type=JobSeekerProfile.AccountType.JOB_SEEKER,
-        visibility__in=[JobSeekerProfile.Visibility.PUBLIC, JobSeekerProfile.Visibility.RECRUITERS]
-    ).select_related('user').order_by('pk')
-
-    # Filter applications based on request parameters
-    applications = Application.objects.filter(job__posted_by=request.user) # Only applications for jobs posted by the current recruiter
+def _applicant_map_applications(request):
+    """The recruiter's applications narrowed by the map's filter parameters"""
+    applications = Application.objects.filter(job__posted_by=request.user)
 
     job_id = request.GET.get("job_id")
     status = request.GET.get("status")
@@ -304,7 +341,7 @@ def applicant_map_data_api(request):
     search_query = request.GET.get("search", "").strip()
 
     if job_id:
-        applications = applications.filter(job__id=job_id)
+        applications = applications.filter(job_id=int(job_id))
     if status:
         applications = applications.filter(status=status)
     if priority:
@@ -319,22 +356,132 @@ def applicant_map_data_api(request):
             Q(applicant__email__icontains=search_query)
         )
 
-    # Get the unique job seeker profiles from the filtered applications
-    filtered_profile_ids = applications.values_list('applicant__jobseeker_profile__id', flat=True).distinct()
-    profiles = profiles_query.filter(id__in=filtered_profile_ids)
+    # Joined applicant profiles that can be shown on the map
+    return applications.filter(
+        applicant__jobseeker_profile__latitude__isnull=False,
+        applicant__jobseeker_profile__longitude__isnull=False,
+        applicant__jobseeker_profile__account_type=JobSeekerProfile.AccountType.JOB_SEEKER,
+        applicant__jobseeker_profile__visibility__in=[
+            JobSeekerProfile.Visibility.PUBLIC, JobSeekerProfile.Visibility.RECRUITERS,
+        ],
+    )
 
-    results = []
-    for profile in profiles:
-        results.append({
-            'pk': profile.pk,
-            'username': profile.user.username,
-            'headline': profile.headline,
-            'latitude': float(profile.latitude),
-            'longitude': float(profile.longitude),
-            'detail_url': reverse('accounts:profile_detail_pk', args=[profile.pk])
-        })
-    
-    return JsonResponse({'results': results})
+
+def _parse_bbox(value):
+    """(west, south, east, north) from "west,south,east,north", or None"""
+    if not value:
+        return None
+    west, south, east, north = (float(part) for part in value.split(','))
+    if not (-90 <= south <= north <= 90):
+        raise ValueError("Invalid latitude range")
+    return west, south, east, north
+
+
+def _filter_bbox(applications, bbox):
+    west, south, east, north = bbox
+    applications = applications.filter(
+        applicant__jobseeker_profile__latitude__gte=south,
+        applicant__jobseeker_profile__latitude__lte=north,
+    )
+    if east - west >= 360:
+        return applications
+    # Normalise to [-180, 180); a box crossing the antimeridian wraps around
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    if west <= east:
+        return applications.filter(
+            applicant__jobseeker_profile__longitude__gte=west,
+            applicant__jobseeker_profile__longitude__lte=east,
+        )
+    return applications.filter(
+        Q(applicant__jobseeker_profile__longitude__gte=west) | Q(applicant__jobseeker_profile__longitude__lte=east)
+    )
+
+
+def _applicant_map_payload(applications, zoom):
+    """
+    Compact map data: below MAP_CLUSTER_MAX_ZOOM, grid clusters aggregated in
+    SQL as [lat, lon, count]; otherwise individual profiles as
+    [profile id, lat, lon, username, headline].
+    """
+    latitude = Cast('applicant__jobseeker_profile__latitude', FloatField())
+    longitude = Cast('applicant__jobseeker_profile__longitude', FloatField())
+    if zoom is not None and zoom < MAP_CLUSTER_MAX_ZOOM:
+        # Cells of roughly 1/MAP_CELLS_PER_TILE of a 256px map tile at this zoom
+        cell = 360 / (2 ** zoom) / MAP_CELLS_PER_TILE
+        clusters = (
+            applications.annotate(
+                cell_lat=Floor(latitude / Value(cell)), cell_lon=Floor(longitude / Value(cell)),
+            )
+            .order_by().values('cell_lat', 'cell_lon')
+            .annotate(
+                count=Count('applicant__jobseeker_profile', distinct=True),
+                lat=Avg(latitude), lon=Avg(longitude),
+            )
+            .values_list('lat', 'lon', 'count')
+        )
+        return {'clusters': [[round(lat, 5), round(lon, 5), count] for lat, lon, count in clusters]}
+
+    points = list(
+        applications.order_by('applicant__jobseeker_profile__id')
+        .values_list(
+            'applicant__jobseeker_profile__id',
+            'applicant__jobseeker_profile__latitude',
+            'applicant__jobseeker_profile__longitude',
+            'applicant__username',
+            'applicant__jobseeker_profile__headline',
+        )
+        .distinct()[:MAP_POINT_LIMIT + 1]
+    )
+    return {
+        'points': [
+            [pk, round(float(lat), 5), round(float(lon), 5), username, headline]
+            for pk, lat, lon, username, headline in points[:MAP_POINT_LIMIT]
+        ],
+        'truncated': len(points) > MAP_POINT_LIMIT,
+        # Profile links are built client-side from one template, not reversed per row
+        'profile_url': reverse('accounts:profile_detail_pk', args=[MAP_URL_PLACEHOLDER]).replace(
+            str(MAP_URL_PLACEHOLDER), '{pk}'
+        ),
+    }
+
+
+@recruiter_required
+def applicant_map_data_api(request):
+    """
+    Applicant locations for the map on the applications page, from one query
+    joining the recruiter's applications to applicant profiles.
+
+    Optional ?bbox=west,south,east,north limits results to the visible map and
+    ?zoom= switches to server-side clusters when zoomed out. Responses are
+    cached per recruiter and query for MAP_DATA_CACHE_TIMEOUT seconds and carry
+    an ETag, so repeated pans over the same area are cheap.
+    """
+    try:
+        bbox = _parse_bbox(request.GET.get('bbox'))
+        zoom = int(request.GET['zoom']) if request.GET.get('zoom') else None
+        applications = _applicant_map_applications(request)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid map parameters'}, status=400)
+
+    cache_key = 'applicant-map:{}:{}'.format(
+        request.user.pk, hashlib.md5(request.GET.urlencode().encode()).hexdigest(),
+    )
+    content = cache.get(cache_key)
+    if content is None:
+        if bbox is not None:
+            applications = _filter_bbox(applications, bbox)
+        payload = _applicant_map_payload(applications, zoom)
+        content = json.dumps(payload, separators=(',', ':'))
+        cache.set(cache_key, content, MAP_DATA_CACHE_TIMEOUT)
+
+    etag = quote_etag(hashlib.md5(content.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=MAP_DATA_CACHE_TIMEOUT)
+    return response
 
 
 @recruiter_required
@@ -364,12 +511,13 @@ def saved_search_detail(request, search_id):
     # Mark the saved search as checked when its detail page is viewed
     # Also mark all associated NEW_MATCH TalentMessages as read
     saved_search.mark_checked()
-    TalentMessage.objects.filter(
+    marked_read = TalentMessage.objects.filter(
         recruiter=request.user,
         saved_search=saved_search,
         message_type=TalentMessage.MessageType.NEW_MATCH,
         is_read=False
     ).update(is_read=True)
+    talent_messages_marked_read(request.user.pk, marked_read)
 
     # Get matching profiles
     profiles = saved_search.get_matching_profiles()
@@ -395,6 +543,10 @@ def edit_saved_search(request, search_id):
         form = SavedSearchForm(request.POST, instance=saved_search)
         if form.is_valid():
             form.save()
+            # Re-evaluate existing profiles when the criteria changed
+            criteria_fields = {'query', 'skills', 'location_city', 'location_state', 'location_country', 'is_active'}
+            if saved_search.is_active and criteria_fields.intersection(form.changed_data):
+                schedule_backfill(saved_search)
             messages.success(request, f'Saved search "{saved_search.name}" updated successfully!')
             return redirect('accounts:saved_searches')
     else:
@@ -466,13 +618,14 @@ def talent_messages(request):
         message_type=TalentMessage.MessageType.NEW_MATCH,
         is_read=False
     ).update(is_read=True)
+    talent_messages_marked_read(request.user.pk, messages_marked_as_read_count)
     
     # If any new matches were marked as read, set unread_count to 0 for immediate badge update.
     # Otherwise, calculate the actual unread count for NEW_MATCH messages.
     if messages_marked_as_read_count > 0:
         unread_count = 0
     else:
-        unread_count = TalentMessage.objects.filter(recruiter=request.user, message_type=TalentMessage.MessageType.NEW_MATCH, is_read=False).count()
+        unread_count = get_unread_counts(request.user)['talent_unread_count']
 
     paginator = Paginator(profiles_with_new_matches, 20)
     page_number = request.GET.get("page")
@@ -488,34 +641,12 @@ def talent_messages(request):
 @recruiter_required
 def check_new_matches(request):
     """Check for new matches across all active saved searches and create messages"""
-    saved_searches = SavedSearch.objects.filter(recruiter=request.user, is_active=True)
-    new_messages_count = 0
-    
-    for saved_search in saved_searches:
-        new_matches = saved_search.get_new_matches_since_last_check()
-        
-        for profile in new_matches:
-            # Create a message for each new match
-            message, created = TalentMessage.objects.get_or_create(
-                recruiter=request.user,
-                saved_search=saved_search,
-                profile=profile,
-                message_type=TalentMessage.MessageType.NEW_MATCH,
-                defaults={
-                    'title': f'New match for "{saved_search.name}"',
-                    'content': (
-                        f'{profile.user.username if profile.user else "Unknown User"} matches your saved search criteria. '
-                        f'{"Headline: " + profile.headline if profile.headline else ""}'
-                    )
-                }
-            )
-            if created:
-                new_messages_count += 1
-        
-        # Mark this search as checked
-        if new_matches.exists():
-            saved_search.mark_checked()
-    
+    saved_searches = SavedSearch.objects.filter(recruiter=request.user, is_active=True).prefetch_related('skills')
+
+    # Evaluate all searches in a few set-based queries, bulk-insert the new
+    # messages and bump last_check for every search that had matches
+    new_messages_count = create_new_match_messages(saved_searches)
+
     return JsonResponse({
         'success': True,
         'new_messages': new_messages_count,
@@ -523,96 +654,203 @@ def check_new_matches(request):
     })
 
 
-@recruiter_required
+@login_required
 def get_unread_messages_count(request):
-    """Get count of unread messages for the current recruiter"""
-    count = TalentMessage.objects.filter(recruiter=request.user, message_type=TalentMessage.MessageType.NEW_MATCH, is_read=False).count()
-    return JsonResponse({'unread_count': count})
+    """
+    Get unread counts for the current user.
+
+    With ?wait=1 this is the long-polling fallback for WSGI deployments: the
+    request blocks until the count changes (or UNREAD_LONG_POLL_TIMEOUT passes)
+    relative to the `version` the client last saw.
+    """
+    version = broker.version(request.user.pk)
+    if request.GET.get('wait'):
+        version = broker.wait(request.user.pk, request.GET.get('version', ''), UNREAD_LONG_POLL_TIMEOUT)
+    counts = get_unread_counts(request.user)
+    counts['version'] = version
+    return JsonResponse(counts)
+
+
+@login_required
+async def unread_messages_stream(request):
+    """Server-Sent Events stream of unread counts (ASGI only)"""
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker can't hold an open stream; 204 tells EventSource to
+        # stop reconnecting so the page falls back to long-polling
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        broker.subscribe(user.pk, loop, queue)
+        try:
+            last_counts = None
+            while True:
+                counts = await sync_to_async(get_unread_counts)(user)
+                if counts != last_counts:
+                    last_counts = counts
+                    yield f"event: unread\ndata: {json.dumps(counts)}\n\n"
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=UNREAD_STREAM_RESYNC)
+                    # Collapse bursts of events into a single recount
+                    while not queue.empty():
+                        queue.get_nowait()
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            broker.unsubscribe(user.pk, loop, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 # Messaging Views
 
+def _encode_conversation_cursor(conversation):
+    """Opaque keyset cursor: last activity in epoch microseconds plus the id"""
+    micros = (conversation.updated_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{conversation.pk}"
+
+
+def _decode_conversation_cursor(cursor):
+    """Return (updated_at, id) for a cursor, or None if it is missing or malformed"""
+    try:
+        micros, pk = (int(part) for part in cursor.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return CURSOR_EPOCH + timedelta(microseconds=micros), pk
+
+
 @login_required
 def conversations_list(request):
-    """List all conversations for the current user"""
+    """List the current user's conversations, most recently active first"""
     # Check if user has a profile and is a recruiter
     is_recruiter = (
         hasattr(request.user, 'jobseeker_profile') and 
         request.user.jobseeker_profile.account_type == JobSeekerProfile.AccountType.RECRUITER
     )
-    
+    unread_only = request.GET.get('unread') == '1'
+
     if is_recruiter:
         # Recruiters see conversations they started
-        conversations = Conversation.objects.filter(recruiter=request.user).select_related('candidate', 'candidate__jobseeker_profile').prefetch_related('messages')
-        
-        # Get talent notifications (new matches from saved searches)
-        # Get unique profile IDs first (works with all databases)
-        unread_profile_ids = TalentMessage.objects.filter(
-            recruiter=request.user,
-            message_type=TalentMessage.MessageType.NEW_MATCH,
-            is_read=False
-        ).values_list('profile_id', flat=True).distinct()
-        
-        # Get the actual profiles
-        talent_notifications = JobSeekerProfile.objects.filter(
-            id__in=unread_profile_ids
-        ).annotate(
-            latest_message_date=models.Max('talentmessage__created_at')
-        ).prefetch_related(
-            models.Prefetch(
-                'talentmessage_set',
-                queryset=TalentMessage.objects.filter(
-                    recruiter=request.user, 
-                    message_type=TalentMessage.MessageType.NEW_MATCH,
-                    is_read=False
-                ).select_related('saved_search').order_by('-created_at'),
-                to_attr='unread_match_messages'
-            )
-        ).order_by('-latest_message_date')
-        
-        # Mark all NEW_MATCH talent messages as read when viewing this page
-        TalentMessage.objects.filter(
-            recruiter=request.user,
-            message_type=TalentMessage.MessageType.NEW_MATCH,
-            is_read=False
-        ).update(is_read=True)
-        
+        conversations = Conversation.objects.filter(recruiter=request.user).select_related('candidate')
+        if unread_only:
+            conversations = conversations.filter(recruiter_unread_count__gt=0)
     else:
         # Candidates see conversations where they are the candidate
-        conversations = Conversation.objects.filter(candidate=request.user).select_related('recruiter', 'recruiter__jobseeker_profile').prefetch_related('messages')
-        talent_notifications = None
-    
-    # Add unread counts for each conversation
+        conversations = Conversation.objects.filter(candidate=request.user).select_related('recruiter')
+        if unread_only:
+            conversations = conversations.filter(candidate_unread_count__gt=0)
+
+    # Keyset pagination on (updated_at, id): each page is an index range scan,
+    # however deep the recruiter pages
+    position = _decode_conversation_cursor(request.GET.get('after'))
+    if position:
+        updated_at, pk = position
+        conversations = conversations.filter(
+            Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, pk__lt=pk)
+        )
+    conversations = list(conversations.order_by('-updated_at', '-pk')[:CONVERSATIONS_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(conversations) > CONVERSATIONS_PAGE_SIZE:
+        conversations = conversations[:CONVERSATIONS_PAGE_SIZE]
+        next_cursor = _encode_conversation_cursor(conversations[-1])
+
+    # Unread counts and the latest-message summary are denormalized onto each
+    # conversation, so the list renders without touching the messages table
     for conversation in conversations:
         conversation.unread_count = conversation.get_unread_count_for_user(request.user)
-        conversation.latest_message = conversation.get_latest_message()
-    
+
+    unread_counts = get_unread_counts(request.user)
     context = {
         'conversations': conversations,
         'is_recruiter': is_recruiter,
-        'talent_notifications': talent_notifications,
-        'unread_count': 0,  # Set to 0 since we just marked everything as read
+        'unread_only': unread_only,
+        'next_cursor': next_cursor,
+        'is_first_page': position is None,
+        # The talent match section is fetched separately, and only when there is something to show
+        'has_talent_notifications': is_recruiter and unread_counts['talent_unread_count'] > 0,
+        'unread_count': unread_counts['unread_count'],
     }
     return render(request, 'accounts/conversations_list.html', context)
 
 
+@recruiter_required
+def talent_notifications(request):
+    """
+    HTML fragment with the recruiter's unread talent matches, loaded lazily by
+    the conversations page. Viewing it marks the matches it shows as read.
+    """
+    unread_matches = TalentMessage.objects.filter(
+        recruiter=request.user,
+        message_type=TalentMessage.MessageType.NEW_MATCH,
+        is_read=False
+    )
+
+    # Get the actual profiles, newest match first
+    profiles = list(
+        JobSeekerProfile.objects.filter(
+            id__in=unread_matches.values('profile_id')
+        ).select_related('user').annotate(
+            # Newest of this recruiter's unread matches, not of every recruiter's messages
+            latest_message_date=models.Max('talentmessage__created_at', filter=models.Q(
+                talentmessage__recruiter=request.user,
+                talentmessage__message_type=TalentMessage.MessageType.NEW_MATCH,
+                talentmessage__is_read=False,
+            ))
+        ).prefetch_related(
+            models.Prefetch(
+                'talentmessage_set',
+                queryset=unread_matches.select_related('saved_search').order_by('-created_at'),
+                to_attr='unread_match_messages'
+            )
+        ).order_by('-latest_message_date')[:TALENT_NOTIFICATIONS_LIMIT]
+    )
+
+    # Mark the matches just shown as read; ones past the limit stay unread for next time
+    shown = [message.pk for profile in profiles for message in profile.unread_match_messages]
+    talent_messages_marked_read(request.user.pk, unread_matches.filter(pk__in=shown).update(is_read=True))
+
+    response = render(request, 'accounts/_talent_notifications.html', {'talent_notifications': profiles})
+    response['X-Unread-Count'] = get_unread_counts(request.user)['unread_count']
+    return response
+
+
+def _message_page(conversation, before_id=None):
+    """
+    The newest MESSAGES_PAGE_SIZE messages older than before_id (newest overall
+    if None), oldest first, and whether there are more before them.
+    """
+    page = conversation.messages.order_by('-pk')
+    if before_id is not None:
+        page = page.filter(pk__lt=before_id)
+    page = list(page[:MESSAGES_PAGE_SIZE + 1])
+    has_more = len(page) > MESSAGES_PAGE_SIZE
+    return page[:MESSAGES_PAGE_SIZE][::-1], has_more
+
+
+def _mark_delivered_read(conversation, user, page):
+    """Advance the user's read cursor to the newest message just delivered to them"""
+    if page:
+        mark_conversation_read(conversation, user.pk, page[-1].pk)
+
+
 @login_required
 def conversation_detail(request, conversation_id):
-    """View a specific conversation and its messages"""
-    conversation = get_object_or_404(Conversation, id=conversation_id)
+    """View a conversation: its latest messages, with older ones loaded on scroll"""
+    conversation = get_object_or_404(
+        Conversation.objects.select_related('recruiter', 'candidate'), id=conversation_id,
+    )
     
     # Check if user is part of this conversation
-    if request.user not in [conversation.recruiter, conversation.candidate]:
+    if request.user.pk not in (conversation.recruiter_id, conversation.candidate_id):
         messages.error(request, "You don't have permission to view this conversation.")
         return redirect('accounts:conversations_list')
     
-    # Get all messages in this conversation
-    message_list = conversation.messages.all()
-    
-    # Mark messages as read when viewed
-    unread_messages = message_list.filter(is_read=False).exclude(sender=request.user)
-    unread_messages.update(is_read=True)
-    
     # Create form for new messages
     if request.method == 'POST':
         form = MessageForm(request.POST)
@@ -625,8 +863,12 @@ def conversation_detail(request, conversation_id):
     else:
         form = MessageForm()
     
+    # Only the latest page is rendered; marking read is limited to that page
+    message_list, has_older = _message_page(conversation)
+    _mark_delivered_read(conversation, request.user, message_list)
+    
     # Determine the other participant
-    other_user = conversation.candidate if request.user == conversation.recruiter else conversation.recruiter
+    other_user = conversation.candidate if request.user.pk == conversation.recruiter_id else conversation.recruiter
     
     # Check if user has a profile and is a recruiter
     is_recruiter = (
@@ -637,6 +879,7 @@ def conversation_detail(request, conversation_id):
     context = {
         'conversation': conversation,
         'message_list': message_list,
+        'has_older': has_older,
         'form': form,
         'other_user': other_user,
         'is_recruiter': is_recruiter,
@@ -644,6 +887,31 @@ def conversation_detail(request, conversation_id):
     return render(request, 'accounts/conversation_detail.html', context)
 
 
+@login_required
+def conversation_messages_api(request, conversation_id):
+    """JSON page of messages older than ?before_id=, for infinite scroll"""
+    conversation = get_object_or_404(
+        Conversation.objects.filter(Q(recruiter=request.user) | Q(candidate=request.user)),
+        id=conversation_id,
+    )
+    try:
+        before_id = int(request.GET['before_id'])
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'before_id is required'}, status=400)
+
+    page, has_more = _message_page(conversation, before_id)
+    _mark_delivered_read(conversation, request.user, page)
+
+    return JsonResponse({
+        'messages': [
+            dict(message_payload(message), is_mine=message.sender_id == request.user.pk)
+            for message in page
+        ],
+        'has_more': has_more,
+        'next_before_id': page[0].pk if page and has_more else None,
+    })
+
+
 @recruiter_required
 def start_conversation(request, candidate_id):
     """Start a new conversation with a candidate (recruiters only)"""
@@ -672,9 +940,12 @@ def start_conversation(request, candidate_id):
 def send_message(request, conversation_id):
     """Send a message in a conversation"""
     conversation = get_object_or_404(Conversation, id=conversation_id)
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     
     # Check if user is part of this conversation
-    if request.user not in [conversation.recruiter, conversation.candidate]:
+    if request.user.pk not in (conversation.recruiter_id, conversation.candidate_id):
+        if is_ajax:
+            return JsonResponse({'success': False, 'error': 'Not a participant'}, status=403)
         messages.error(request, "You don't have permission to send messages in this conversation.")
         return redirect('accounts:conversations_list')
     
@@ -685,8 +956,13 @@ def send_message(request, conversation_id):
             message.conversation = conversation
             message.sender = request.user
             message.save()
+            if is_ajax:
+                # The page appends the message itself; open sockets get it from the broker
+                return JsonResponse({'success': True, 'message': dict(message_payload(message), is_mine=True)})
             messages.success(request, "Message sent successfully!")
         else:
+            if is_ajax:
+                return JsonResponse({'success': False, 'error': form.errors.get_json_data()}, status=400)
             messages.error(request, "Failed to send message. Please try again.")
     
     return redirect('accounts:conversation_detail', conversation_id=conversation.id)
@@ -697,276 +973,194 @@ def send_message(request, conversation_id):
 @admin_required
 def admin_export_dashboard(request):
     """Dashboard for administrators to select and export data"""
-    User = get_user_model()
-    
-    # Get counts for display
-    stats = {
-        'users': User.objects.count(),
-        'profiles': JobSeekerProfile.objects.count(),
-        'jobs': Job.objects.count(),
-        'applications': Application.objects.count(),
-        'skills': Skill.objects.count(),
-        'conversations': Conversation.objects.count(),
-        'messages': Message.objects.count(),
-        'saved_searches': SavedSearch.objects.count(),
-    }
-    
+    # Without a worker command nothing else notices jobs whose thread died
+    recover_export_jobs()
     context = {
-        'stats': stats,
+        # Maintained counters rather than COUNT queries (see accounts.stats)
+        'stats': stat_counts(),
+        'export_jobs': ExportJob.objects.select_related('requested_by')[:EXPORT_JOBS_LISTED],
+        'export_names': list(EXPORTS),
+        'export_formats': ExportJob.Format.choices,
     }
     return render(request, 'accounts/admin_export.html', context)
 
 
+def _export_job_state(job):
+    return {
+        'id': job.pk,
+        'export': job.export,
+        'format': job.format,
+        'status': job.status,
+        'rows_written': job.rows_written,
+        'rows_total': job.rows_total,
+        'rows_per_second': round(job.rows_per_second) if job.rows_per_second is not None else None,
+        'percent_done': job.percent_done,
+        'file_size': job.file_size,
+        'error': job.error,
+        'download_url': reverse('accounts:download_export_job', args=[job.pk]) if job.status == ExportJob.Status.DONE else None,
+    }
+
+
+@admin_required
+@require_POST
+def enqueue_export_job(request):
+    """Queue a background export; it is written to a gzip file instead of streamed"""
+    export = request.POST.get('export')
+    export_format = request.POST.get('format', ExportJob.Format.CSV)
+    if export not in EXPORTS or export_format not in ExportJob.Format.values:
+        messages.error(request, "Unknown export or format.")
+        return redirect('accounts:admin_export_dashboard')
+
+    job = ExportJob.objects.create(requested_by=request.user, export=export, format=export_format)
+    schedule_export_job(job)
+    recover_export_jobs()
+    messages.success(request, f"Export of {export} queued. It will appear below when ready.")
+    return redirect('accounts:admin_export_dashboard')
+
+
+@admin_required
+def export_job_status(request, job_id):
+    """Progress of one background export, polled by the dashboard"""
+    job = get_object_or_404(ExportJob, pk=job_id)
+    return JsonResponse(_export_job_state(job))
+
+
+def _parse_byte_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the whole
+    file (several ranges, another unit or a malformed header), or ValueError
+    if the range can't be satisfied.
+    """
+    unit, _, spec = header.partition('=')
+    first, dash, last = spec.strip().partition('-')
+    if unit.strip() != 'bytes' or not dash or not (first or last):
+        return None
+    if (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length <= 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("Range starts past the end of the file")
+    return start, end
+
+
+def _file_blocks(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            block = file.read(min(EXPORT_DOWNLOAD_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+@admin_required
+def download_export_job(request, job_id):
+    """
+    The gzip file of a finished export. Honours single-range Range requests
+    (and If-Range) so interrupted downloads of large files can resume.
+    """
+    job = get_object_or_404(ExportJob, pk=job_id, status=ExportJob.Status.DONE)
+    path = export_job_path(job)
+    if not path.exists():
+        raise Http404("Export file no longer exists")
+
+    size = path.stat().st_size
+    etag = quote_etag(f"{job.pk}-{size}-{int(job.finished_at.timestamp())}")
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = _parse_byte_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(_file_blocks(path, start, end - start + 1), content_type='application/gzip')
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'attachment; filename="{job.file_name}"'
+    return response
+
+
 @admin_required
 def export_users(request):
     """Export all users to CSV"""
-    User = get_user_model()
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="users_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Username', 'Email', 'First Name', 'Last Name', 'Is Staff', 'Is Superuser', 'Is Active', 'Date Joined', 'Last Login'])
-    
-    for user in User.objects.all():
-        writer.writerow([
-            user.id,
-            user.username,
-            user.email,
-            user.first_name,
-            user.last_name,
-            user.is_staff,
-            user.is_superuser,
-            user.is_active,
-            user.date_joined,
-            user.last_login,
-        ])
-    
-    return response
+    return EXPORTS['users'].response(request)
 
 
 @admin_required
 def export_profiles(request):
     """Export all job seeker profiles to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="profiles_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'User ID', 'Username', 'Account Type', 'Headline', 'Bio', 
-        'Education', 'Experience', 'Location City', 'Location State', 
-        'Location Country', 'Latitude', 'Longitude', 'Commute Radius',
-        'Portfolio URL', 'LinkedIn URL', 'GitHub URL', 
-        'Visibility', 'Show Email', 'Skills', 'Updated At'
-    ])
-    
-    for profile in JobSeekerProfile.objects.select_related('user').prefetch_related('skills').all():
-        skills_list = ', '.join([skill.name for skill in profile.skills.all()])
-        writer.writerow([
-            profile.user.id,
-            profile.user.username,
-            profile.account_type,
-            profile.headline,
-            profile.bio,
-            profile.education,
-            profile.experience,
-            profile.location_city,
-            profile.location_state,
-            profile.location_country,
-            profile.latitude,
-            profile.longitude,
-            profile.commute_radius,
-            profile.portfolio_url,
-            profile.linkedin_url,
-            profile.github_url,
-            profile.visibility,
-            profile.show_email,
-            skills_list,
-            profile.updated_at,
-        ])
-    
-    return response
+    return EXPORTS['profiles'].response(request)
 
 
 @admin_required
 def export_jobs(request):
     """Export all jobs to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="jobs_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Title', 'Company', 'Description', 'Location City', 
-        'Location State', 'Location Country', 'Latitude', 'Longitude',
-        'Min Salary', 'Max Salary', 'Work Type', 'Visa Sponsorship',
-        'Posted By (Username)', 'Skills', 'Created At'
-    ])
-    
-    for job in Job.objects.select_related('posted_by').prefetch_related('skills').all():
-        skills_list = ', '.join([skill.name for skill in job.skills.all()])
-        posted_by = job.posted_by.username if job.posted_by else 'N/A'
-        writer.writerow([
-            job.id,
-            job.title,
-            job.company,
-            job.description,
-            job.location_city,
-            job.location_state,
-            job.location_country,
-            job.latitude,
-            job.longitude,
-            job.min_salary,
-            job.max_salary,
-            job.work_type,
-            job.visa_sponsorship,
-            posted_by,
-            skills_list,
-            job.created_at,
-        ])
-    
-    return response
+    return EXPORTS['jobs'].response(request)
 
 
 @admin_required
 def export_applications(request):
     """Export all applications to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="applications_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Job Title', 'Job Company', 'Applicant Username', 
-        'Applicant Email', 'Status', 'Priority', 'Flagged', 
-        'Applicant Note', 'Recruiter Notes', 'Position in Stage',
-        'Days in Current Stage', 'Stage Changed At', 'Created At', 'Updated At'
-    ])
-    
-    for app in Application.objects.select_related('job', 'applicant').all():
-        writer.writerow([
-            app.id,
-            app.job.title,
-            app.job.company,
-            app.applicant.username,
-            app.applicant.email,
-            app.status,
-            app.priority,
-            app.flagged,
-            app.note,
-            app.recruiter_notes,
-            app.position_in_stage,
-            app.days_in_current_stage(),
-            app.stage_changed_at,
-            app.created_at,
-            app.updated_at,
-        ])
-    
-    return response
+    return EXPORTS['applications'].response(request)
 
 
 @admin_required
 def export_skills(request):
     """Export all skills to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="skills_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Skill Name', 'Number of Jobs', 'Number of Profiles'])
-    
-    for skill in Skill.objects.all():
-        jobs_count = skill.jobs.count()
-        profiles_count = skill.profiles.count()
-        writer.writerow([
-            skill.id,
-            skill.name,
-            jobs_count,
-            profiles_count,
-        ])
-    
-    return response
+    return EXPORTS['skills'].response(request)
 
 
 @admin_required
 def export_conversations(request):
     """Export all conversations to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="conversations_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Recruiter Username', 'Candidate Username', 
-        'Message Count', 'Created At', 'Updated At'
-    ])
-    
-    for conversation in Conversation.objects.select_related('recruiter', 'candidate').all():
-        message_count = conversation.messages.count()
-        writer.writerow([
-            conversation.id,
-            conversation.recruiter.username,
-            conversation.candidate.username,
-            message_count,
-            conversation.created_at,
-            conversation.updated_at,
-        ])
-    
-    return response
+    return EXPORTS['conversations'].response(request)
 
 
 @admin_required
 def export_messages(request):
     """Export all messages to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="messages_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Conversation ID', 'Sender Username', 'Content', 
-        'Is Read', 'Created At'
-    ])
-    
-    for message in Message.objects.select_related('conversation', 'sender').all():
-        writer.writerow([
-            message.id,
-            message.conversation.id,
-            message.sender.username,
-            message.content,
-            message.is_read,
-            message.created_at,
-        ])
-    
-    return response
+    return EXPORTS['messages'].response(request)
 
 
 @admin_required
 def export_saved_searches(request):
     """Export all saved searches to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="saved_searches_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Recruiter Username', 'Search Name', 'Query', 
-        'Skills', 'Location City', 'Location State', 'Location Country',
-        'Is Active', 'Last Check', 'Created At', 'Updated At'
-    ])
-    
-    for search in SavedSearch.objects.select_related('recruiter').prefetch_related('skills').all():
-        skills_list = ', '.join([skill.name for skill in search.skills.all()])
-        writer.writerow([
-            search.id,
-            search.recruiter.username,
-            search.name,
-            search.query,
-            skills_list,
-            search.location_city,
-            search.location_state,
-            search.location_country,
-            search.is_active,
-            search.last_check,
-            search.created_at,
-            search.updated_at,
-        ])
-    
-    return response
+    return EXPORTS['saved_searches'].response(request)
+
+
+@admin_required
+def export_snapshot(request):
+    """Export every table as CSV files in one ZIP, read from a single database snapshot"""
+    return Snapshot().response(request)
+
+
+@admin_required
+def export_deletions(request, export):
+    """Tombstones (ID, Deleted At) of one export's deleted rows, for incremental consumers"""
+    if export not in EXPORTS:
+        raise Http404("Unknown export")
+    return EXPORTS[export].deletions_response(request)
 
 
 # Create your views here.
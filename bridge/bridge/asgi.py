@@ -2,6 +2,10 @@
 ASGI config for bridge project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn bridge.asgi:application``) to enable
+streaming endpoints such as the unread-count Server-Sent Events stream and the
+per-conversation WebSockets. HTTP goes to Django; WebSocket connections go to
+accounts.realtime.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +17,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bridge.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup so the app registry is ready
+from accounts.realtime import conversation_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        await conversation_socket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -79,6 +79,11 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # WAL lets writers commit while long reads (such as the snapshot
+            # export's single transaction) are in progress
+            "init_command": "PRAGMA journal_mode=WAL",
+        },
     }
 }
 
@@ -129,6 +134,24 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'Bridge <noreply@bridge.example.com>'
 SITE_URL = 'http://127.0.0.1:8000'
 
+# Run saved-search match backfills in a background thread (set False to run inline)
+SAVED_SEARCH_BACKFILL_ASYNC = True
+
+# Run background admin exports in a thread of the web process. Set False when a
+# `manage.py run_export_jobs --poll` worker runs them instead.
+EXPORT_JOBS_IN_PROCESS = True
+# Where finished export files are kept
+EXPORT_JOBS_DIR = BASE_DIR / "exports"
+
+# Broker relaying new messages to conversation WebSockets (see accounts.realtime).
+# The in-memory default only reaches sockets served by the same process.
+MESSAGE_BROKER_BACKEND = 'accounts.realtime.InMemoryMessageBroker'
+
+# Geocoder behind accounts.geocoding (results are cached in the database).
+# 'accounts.geocoding.StaticGeocoder' answers from GEOCODING_STATIC_LOCATIONS
+# without network access, for tests and offline development.
+GEOCODING_BACKEND = 'accounts.geocoding.NominatimGeocoder'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
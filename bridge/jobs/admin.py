@@ -38,13 +38,13 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_display = ("job", "applicant", "status", "priority", "flagged", "created_at", "stage_changed_at")
     list_filter = ("status", "priority", "flagged", "created_at")
     search_fields = ("job__title", "applicant__username", "applicant__email")
-    readonly_fields = ("created_at", "updated_at", "stage_changed_at")
+    readonly_fields = ("created_at", "updated_at", "stage_changed_at", "stage_rank")
     fieldsets = (
         ("Application Info", {
             "fields": ("job", "applicant", "status", "note")
         }),
         ("Recruiter Management", {
-            "fields": ("priority", "flagged", "recruiter_notes", "position_in_stage")
+            "fields": ("priority", "flagged", "recruiter_notes", "stage_rank")
         }),
         ("Timestamps", {
             "fields": ("created_at", "updated_at", "stage_changed_at"),
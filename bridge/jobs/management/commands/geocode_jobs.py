@@ -1,12 +1,13 @@
 """
 Management command to geocode existing jobs that have location text but no coordinates.
+
+Jobs are grouped by location, so each distinct location is geocoded once
+(and answered from the geocoding cache if it was looked up before).
 """
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.geocoding import GeocodingError, geocode, normalize_location
 from jobs.models import Job
-import urllib.request
-import urllib.parse
-import json
-import time
 import sys
 
 
@@ -31,63 +32,46 @@ class Command(BaseCommand):
         total = jobs.count()
         self.stdout.write(f"Found {total} jobs to geocode...")
         
+        # Spellings that normalize to the same location share one lookup
+        locations = {}
+        distinct_locations = (
+            jobs.order_by('location_country', 'location_state', 'location_city')
+            .values_list('location_city', 'location_state', 'location_country')
+            .distinct()
+        )
+        for city, state, country in distinct_locations:
+            locations.setdefault(normalize_location(city, state, country), []).append((city, state, country))
+        
         success_count = 0
         fail_count = 0
         
-        for i, job in enumerate(jobs, 1):
-            location_parts = [
-                p for p in [
-                    job.location_city,
-                    job.location_state,
-                    job.location_country
-                ] if p
-            ]
+        for i, (location_query, spellings) in enumerate(locations.items(), 1):
+            matching = Job.objects.none()
+            for city, state, country in spellings:
+                matching |= jobs.filter(location_city=city, location_state=state, location_country=country)
+            count = matching.count()
+            self.stdout.write(f"\n[{i}/{len(locations)}] Geocoding: {location_query} ({count} jobs)")
             
-            if not location_parts:
+            try:
+                location = geocode(location_query)
+            except GeocodingError as e:
+                self.stdout.write(self.style.ERROR(f"  ✗ Error: {e}"))
+                fail_count += count
                 continue
             
-            location_query = ', '.join(location_parts)
-            self.stdout.write(f"\n[{i}/{total}] Geocoding: {job.title} at {job.company} - {location_query}")
+            if location is None:
+                self.stdout.write(self.style.WARNING(f"  ✗ Not found"))
+                fail_count += count
+                continue
             
-            try:
-                # Use Nominatim API
-                base_url = 'https://nominatim.openstreetmap.org/search'
-                params = {
-                    'q': location_query,
-                    'format': 'json',
-                    'limit': 1
-                }
-                
-                url = f"{base_url}?{urllib.parse.urlencode(params)}"
-                req = urllib.request.Request(url, headers={'User-Agent': 'JobBridge/1.0'})
-                
-                with urllib.request.urlopen(req, timeout=5) as response:
-                    data = json.loads(response.read().decode())
-                    
-                    if data and len(data) > 0:
-                        lat = float(data[0]['lat'])
-                        lon = float(data[0]['lon'])
-                        
-                        job.latitude = lat
-                        job.longitude = lon
-                        job.save(update_fields=['latitude', 'longitude'])
-                        
-                        self.stdout.write(self.style.SUCCESS(f"  ✓ Success: {lat}, {lon}"))
-                        success_count += 1
-                    else:
-                        self.stdout.write(self.style.WARNING(f"  ✗ Not found"))
-                        fail_count += 1
-                
-                # Be nice to Nominatim - rate limit to 1 request per second
-                time.sleep(1)
-                
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"  ✗ Error: {e}"))
-                fail_count += 1
+            # update() skips auto_now, so bump updated_at for incremental exports ourselves
+            matching.update(latitude=location.latitude, longitude=location.longitude, updated_at=timezone.now())
+            self.stdout.write(self.style.SUCCESS(f"  ✓ Success: {location.latitude}, {location.longitude}"))
+            success_count += count
         
         self.stdout.write("\n" + "=" * 60)
         self.stdout.write(self.style.SUCCESS(f"\nGeocoding complete!"))
+        self.stdout.write(f"  Locations: {len(locations)}")
         self.stdout.write(f"  Success: {success_count}")
         self.stdout.write(f"  Failed: {fail_count}")
         self.stdout.write(f"  Total: {total}")
-
@@ -0,0 +1,39 @@
+"""
+Management command to re-space Kanban rank keys that have grown long.
+
+Repeated drops into the same gap lengthen stage_rank keys; run this
+periodically (e.g. from cron) so keys stay short. Card order is unchanged.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.db.models.functions import Length
+
+from jobs.models import Application
+from jobs.ranking import RANK_REBALANCE_LENGTH
+
+
+class Command(BaseCommand):
+    help = 'Re-space stage_rank keys in Kanban columns whose keys have grown long'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-length', type=int, default=RANK_REBALANCE_LENGTH,
+            help='Rebalance columns holding a key longer than this',
+        )
+
+    def handle(self, *args, **options):
+        columns = list(
+            Application.objects.order_by().values('job_id', 'status')
+            .annotate(longest=Max(Length('stage_rank')))
+            .filter(longest__gt=options['max_length'])
+            .values_list('job_id', 'status')
+        )
+        column_count = 0
+        row_count = 0
+        for job_id, status in columns:
+            # One transaction per column keeps each lock short
+            row_count += Application.objects.filter(job_id=job_id, status=status).rebalance_ranks()
+            column_count += 1
+        self.stdout.write(self.style.SUCCESS("Kanban ranks rebalanced."))
+        self.stdout.write(f"  Columns rebalanced: {column_count}")
+        self.stdout.write(f"  Cards re-ranked: {row_count}")
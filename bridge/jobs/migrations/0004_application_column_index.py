@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_alter_job_options_job_moderated_at_job_moderated_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'status', 'position_in_stage', 'id'], name='application_column_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_stage_events(apps, schema_editor):
+    """
+    Earlier transitions were never recorded: seed one event per application for
+    entering its current stage, so funnels count every existing application.
+    """
+    Application = apps.get_model('jobs', 'Application')
+    ApplicationStageEvent = apps.get_model('jobs', 'ApplicationStageEvent')
+
+    events = []
+    rows = Application.objects.values_list('id', 'job_id', 'status', 'stage_changed_at', 'created_at')
+    for app_id, job_id, status, stage_changed_at, created_at in rows.iterator(chunk_size=2000):
+        events.append(ApplicationStageEvent(
+            application_id=app_id, job_id=job_id, to_status=status, changed_at=stage_changed_at or created_at,
+        ))
+        if len(events) >= 2000:
+            ApplicationStageEvent.objects.bulk_create(events)
+            events = []
+    ApplicationStageEvent.objects.bulk_create(events)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_application_column_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStageEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('applied', 'Applied'), ('review', 'Review'), ('interview', 'Interview'), ('offer', 'Offer'), ('closed', 'Closed')], help_text='Empty when the application was created in to_status', max_length=20)),
+                ('to_status', models.CharField(choices=[('applied', 'Applied'), ('review', 'Review'), ('interview', 'Interview'), ('offer', 'Offer'), ('closed', 'Closed')], max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('previous_stage_duration', models.DurationField(blank=True, help_text='Time the application spent in from_status', null=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_events', to='jobs.application')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_events', to='jobs.job')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['job', 'to_status', 'changed_at'], name='stage_event_entered_idx'), models.Index(fields=['job', 'from_status', 'changed_at'], name='stage_event_left_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_stage_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:50
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of jobs.ranking as of this migration, so later changes to the
+# ranking scheme don't change what it writes
+RANK_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_BASE = len(RANK_DIGITS)
+RANK_HEAD_WIDTH = 6
+RANK_HEAD_MAX = RANK_BASE ** RANK_HEAD_WIDTH - 1
+RANK_STEP = RANK_BASE ** 3
+
+
+def _encode_head(value):
+    digits = []
+    for _ in range(RANK_HEAD_WIDTH):
+        value, digit = divmod(value, RANK_BASE)
+        digits.append(RANK_DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def spread_ranks(count):
+    """`count` short, evenly spaced keys in ascending order"""
+    step = min(RANK_STEP, RANK_HEAD_MAX // (count + 1)) or 1
+    start = max((RANK_HEAD_MAX + 1) // 2 - step * (count // 2), step)
+    return [_encode_head(start + step * index) for index in range(count)]
+
+
+def populate_stage_ranks(apps, schema_editor):
+    """Give every column evenly spaced rank keys in its current display order"""
+    Application = apps.get_model('jobs', 'Application')
+
+    columns = defaultdict(list)
+    rows = Application.objects.order_by('job_id', 'status', 'position_in_stage', '-updated_at', 'id')
+    for app_id, job_id, status in rows.values_list('id', 'job_id', 'status').iterator(chunk_size=2000):
+        columns[(job_id, status)].append(app_id)
+    Application.objects.bulk_update(
+        [
+            Application(pk=app_id, stage_rank=rank)
+            for app_ids in columns.values()
+            for app_id, rank in zip(app_ids, spread_ranks(len(app_ids)))
+        ],
+        ['stage_rank'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_application_stage_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='stage_rank',
+            field=models.CharField(blank=True, help_text='Lexicographic order within the status column (see jobs.ranking)', max_length=64),
+        ),
+        migrations.RunPython(populate_stage_ranks, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='application',
+            options={'ordering': ['stage_rank', 'id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='application',
+            name='application_column_idx',
+        ),
+        migrations.RemoveField(
+            model_name='application',
+            name='position_in_stage',
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'status', 'stage_rank', 'id'], name='application_column_rank_idx'),
+        ),
+    ]
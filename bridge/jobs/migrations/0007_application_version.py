@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_application_stage_rank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Bumped on every edit (not on reordering) for optimistic concurrency control'),
+        ),
+    ]
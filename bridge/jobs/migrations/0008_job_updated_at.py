@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Greatest
+
+
+def backfill_job_updated_at(apps, schema_editor):
+    """Date existing jobs by their last known change rather than the migration run"""
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.update(updated_at=Greatest('created_at', Coalesce('moderated_at', 'created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_application_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_job_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['updated_at'], name='application_updated_idx'),
+        ),
+    ]
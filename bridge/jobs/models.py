@@ -1,8 +1,14 @@
-from django.db import models
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
-from django.db.models import Count
+from django.db.models import Case, Count, F, Max, Q, Value, When
 from django.utils import timezone
 
+from .ranking import rank_between, spread_ranks
+
 
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -41,6 +47,8 @@ class Job(models.Model):
 
     posted_by = models.ForeignKey(get_user_model(), on_delete=models.SET_NULL, null=True, blank=True, related_name="posted_jobs")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Watermark for incremental exports (see accounts.exports)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     moderation_status = models.CharField(
         max_length=20,
@@ -91,6 +99,101 @@ class Job(models.Model):
         return recommended_profiles
 
 
+class ApplicationQuerySet(models.QuerySet):
+    def transition(self, status):
+        """
+        Move every application in the queryset whose status differs to the end
+        of its job's `status` column, stamping stage_changed_at, and log the
+        moves with one bulk INSERT of stage events.
+        Returns the number of applications moved.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            moved = list(
+                self.exclude(status=status).select_for_update(of=("self",)).order_by("stage_rank", "id")
+                .values_list("id", "job_id", "status", "stage_changed_at", "created_at")
+            )
+            if not moved:
+                return 0
+            tails = Application.objects.filter(job_id__in={row[1] for row in moved}, status=status).column_tails()
+            applications = []
+            events = []
+            for app_id, job_id, from_status, stage_changed_at, created_at in moved:
+                tails[(job_id, status)] = rank_between(tails.get((job_id, status)), None)
+                applications.append(Application(
+                    pk=app_id, status=status, stage_rank=tails[(job_id, status)], stage_changed_at=now, updated_at=now,
+                    version=F("version") + 1,
+                ))
+                events.append(ApplicationStageEvent.for_move(
+                    app_id, job_id, from_status, status, now, stage_changed_at or created_at,
+                ))
+            Application.objects.bulk_update(
+                applications, ["status", "stage_rank", "stage_changed_at", "updated_at", "version"], batch_size=500,
+            )
+            ApplicationStageEvent.objects.bulk_create(events, batch_size=500)
+        return len(moved)
+
+    def compare_and_set(self, applications, fields, batch_size=100):
+        """
+        Write `fields` of each in-memory application, but only while its row is
+        still at the version the instance carries, and bump the versions. All
+        or nothing, without row locks: returns the ids of applications that were
+        changed by someone else (writing nothing), or an empty list on success.
+        """
+        applications = list(applications)
+        fields = [self.model._meta.get_field(name) for name in fields if name != "version"]
+        with transaction.atomic():
+            for start in range(0, len(applications), batch_size):
+                batch = applications[start:start + batch_size]
+                values = {
+                    field.attname: Case(
+                        *[When(pk=app.pk, then=Value(getattr(app, field.attname), output_field=field)) for app in batch],
+                        output_field=field,
+                    )
+                    for field in fields
+                }
+                expected = reduce(or_, (Q(pk=app.pk, version=app.version) for app in batch))
+                if self.model._base_manager.filter(expected).update(**values, version=F("version") + 1) < len(batch):
+                    transaction.set_rollback(True)
+                    break
+            else:
+                for app in applications:
+                    app.version += 1
+                return []
+        current = dict(self.model._base_manager.filter(pk__in=[app.pk for app in applications]).values_list("pk", "version"))
+        return [app.pk for app in applications if current.get(app.pk) != app.version]
+
+    def column_tails(self):
+        """{(job_id, status): last stage_rank} for each Kanban column in the queryset"""
+        return {
+            (job_id, status): last
+            for job_id, status, last in self.order_by().values("job_id", "status")
+            .annotate(last=Max("stage_rank")).values_list("job_id", "status", "last")
+        }
+
+    def rebalance_ranks(self):
+        """
+        Re-space the stage_rank keys of every (job, status) column in the
+        queryset, keeping card order, and return the number of rows rewritten.
+        The queryset must cover whole columns.
+        """
+        with transaction.atomic():
+            columns = defaultdict(list)
+            rows = (
+                self.select_for_update(of=("self",)).order_by("job_id", "status", "stage_rank", "id")
+                .values_list("id", "job_id", "status")
+            )
+            for app_id, job_id, status in rows:
+                columns[(job_id, status)].append(app_id)
+            applications = [
+                Application(pk=app_id, stage_rank=rank)
+                for app_ids in columns.values()
+                for app_id, rank in zip(app_ids, spread_ranks(len(app_ids)))
+            ]
+            Application.objects.bulk_update(applications, ["stage_rank"], batch_size=500)
+        return len(applications)
+
+
 class Application(models.Model):
     class Status(models.TextChoices):
         APPLIED = "applied", "Applied"
@@ -113,15 +216,28 @@ class Application(models.Model):
     recruiter_notes = models.TextField(blank=True, help_text="Internal notes for recruiter use only")
     priority = models.CharField(max_length=10, choices=Priority.choices, default=Priority.MEDIUM)
     flagged = models.BooleanField(default=False, help_text="Flag important candidates")
-    position_in_stage = models.PositiveIntegerField(default=0, help_text="Order within status column")
+    stage_rank = models.CharField(
+        max_length=64, blank=True, help_text="Lexicographic order within the status column (see jobs.ranking)",
+    )
     stage_changed_at = models.DateTimeField(null=True, blank=True, help_text="When status last changed")
+    version = models.PositiveIntegerField(
+        default=1, help_text="Bumped on every edit (not on reordering) for optimistic concurrency control",
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ApplicationQuerySet.as_manager()
+
     class Meta:
         unique_together = ("job", "applicant")
-        ordering = ["position_in_stage", "-updated_at"]
+        ordering = ["stage_rank", "id"]
+        indexes = [
+            # Kanban columns are paged by (stage_rank, id) within a job and status
+            models.Index(fields=["job", "status", "stage_rank", "id"], name="application_column_rank_idx"),
+            # Incremental exports select rows changed within a time window
+            models.Index(fields=["updated_at"], name="application_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.applicant} -> {self.job} ({self.status})"
@@ -136,15 +252,159 @@ class Application(models.Model):
         delta = timezone.now() - self.created_at
         return delta.days
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status so save() can detect changes without a query
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def previous_status(self):
+        """Status stored in the database, or None for an unsaved application"""
+        if self._state.adding:
+            return None
+        loaded = getattr(self, "_loaded_status", None)
+        if loaded is None:
+            # Instance built by hand or with status deferred: read the stored row
+            loaded = Application.objects.filter(pk=self.pk).values_list("status", flat=True).first()
+        return loaded
+
+    def status_changed(self):
+        """Whether status differs from the value loaded from the database"""
+        previous = self.previous_status()
+        return previous is not None and previous != self.status
+
+    def move_to_stage(self, status, changed_at):
+        """
+        Change status in memory, for callers writing rows with bulk_update, and
+        return the stage event to record (None if the status is unchanged).
+        The caller assigns stage_rank in the new column.
+        """
+        if status == self.status:
+            return None
+        event = ApplicationStageEvent.for_move(
+            self.pk, self.job_id, self.status, status, changed_at, self.stage_changed_at or self.created_at,
+        )
+        self.status = status
+        self.stage_changed_at = changed_at
+        return event
+
+    def save_if_current(self, **changes):
+        """
+        Apply `changes` and write only those columns, provided the row is still
+        at this instance's version. Returns False, writing nothing, when someone
+        else changed the application since it was loaded; the instance then
+        holds the rejected values, so refresh it before showing current state.
+        """
+        now = timezone.now()
+        status = changes.pop("status", self.status)
+        for field, value in changes.items():
+            setattr(self, field, value)
+        fields = {*changes, "updated_at"}
+        self.updated_at = now
+        event = self.move_to_stage(status, now)
+        if event is not None:
+            column = Application.objects.filter(job_id=self.job_id, status=status)
+            self.stage_rank = rank_between(column.column_tails().get((self.job_id, status)), None)
+            fields.update(("status", "stage_changed_at", "stage_rank"))
+        with transaction.atomic():
+            if Application.objects.compare_and_set([self], fields):
+                return False
+            if event is not None:
+                event.save()
+        self._loaded_status = self.status
+        return True
+
     def save(self, *args, **kwargs):
-        """Track when status changes"""
-        from django.utils import timezone
-        if self.pk:  # Existing application
-            old_app = Application.objects.filter(pk=self.pk).first()
-            if old_app and old_app.status != self.status:
-                self.stage_changed_at = timezone.now()
-        else:  # New application
-            self.stage_changed_at = timezone.now()
+        """Track when status changes and log every stage transition"""
+        update_fields = kwargs.get("update_fields")
+        saves_status = update_fields is None or "status" in update_fields
+        event = None
+        now = timezone.now()
+        if self._state.adding:  # New application
+            self.stage_changed_at = now
+            event = ApplicationStageEvent(to_status=self.status, changed_at=now)
+        elif saves_status:
+            previous = self.previous_status()
+            if previous is not None and previous != self.status:
+                event = ApplicationStageEvent.for_move(
+                    self.pk, self.job_id, previous, self.status, now, self.stage_changed_at or self.created_at,
+                )
+                self.stage_changed_at = now
+                # Cards moved to another column join the end of it
+                self.stage_rank = ""
+                if update_fields is not None:
+                    kwargs["update_fields"] = {*update_fields, "stage_changed_at", "stage_rank"}
+        bumps_version = not self._state.adding
+        if bumps_version:
+            # Increment in SQL so a save from a stale instance cannot move the version back
+            self.version = F("version") + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        if event is not None and not self.stage_rank:
+            column = Application.objects.filter(job_id=self.job_id, status=self.status)
+            tail = column.column_tails().get((self.job_id, self.status))
+            self.stage_rank = rank_between(tail, None)
+        if event is None:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                event.application = self
+                event.job_id = self.job_id
+                event.save()
+        if bumps_version:
+            # Deferred: the new version is read from the row on next access
+            del self.version
+        if saves_status:
+            self._loaded_status = self.status
+
+
+class ApplicationStageEvent(models.Model):
+    """
+    Append-only log of Application status transitions. job is denormalized from
+    the application so pipeline analytics aggregate over (job, stage, time)
+    without joining applications.
+    """
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name="stage_events")
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="stage_events")
+    from_status = models.CharField(
+        max_length=20, choices=Application.Status.choices, blank=True,
+        help_text="Empty when the application was created in to_status",
+    )
+    to_status = models.CharField(max_length=20, choices=Application.Status.choices)
+    changed_at = models.DateTimeField(default=timezone.now)
+    previous_stage_duration = models.DurationField(
+        null=True, blank=True, help_text="Time the application spent in from_status",
+    )
+
+    class Meta:
+        ordering = ["changed_at", "id"]
+        indexes = [
+            # Funnel counts: applications that reached a stage, per job
+            models.Index(fields=["job", "to_status", "changed_at"], name="stage_event_entered_idx"),
+            # Time-in-stage: completed stays in a stage, per job
+            models.Index(fields=["job", "from_status", "changed_at"], name="stage_event_left_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status or '-'} -> {self.to_status} ({self.changed_at})"
+
+    @classmethod
+    def for_move(cls, application_id, job_id, from_status, to_status, changed_at, entered_at):
+        """Unsaved event for a move out of a stage the application entered at `entered_at`"""
+        return cls(
+            application_id=application_id,
+            job_id=job_id,
+            from_status=from_status,
+            to_status=to_status,
+            changed_at=changed_at,
+            previous_stage_duration=changed_at - entered_at if entered_at else None,
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Stage events are append-only")
         super().save(*args, **kwargs)
 
 # Create your models here.
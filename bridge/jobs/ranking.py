@@ -0,0 +1,105 @@
+"""
+Lexicographic rank keys for ordering Kanban cards within a column.
+
+A key is a fixed-width base-36 "head" followed by an optional fractional
+"tail". Sorting the strings sorts the cards, so moving a card only rewrites
+its own key: a key strictly between its new neighbours always exists.
+Appending steps the head by RANK_STEP; inserting between two cards bisects
+their heads, then their tails once the heads are adjacent.
+
+Tails grow by about one character per five inserts into the same gap, so
+columns are re-spaced now and then (see ApplicationQuerySet.rebalance_ranks
+and the rebalance_kanban_ranks command). Only digits and lowercase letters
+are used so every database collation orders keys the same way.
+"""
+RANK_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_BASE = len(RANK_DIGITS)
+RANK_HEAD_WIDTH = 6
+RANK_HEAD_MAX = RANK_BASE ** RANK_HEAD_WIDTH - 1
+# Gap left between consecutive appended cards
+RANK_STEP = RANK_BASE ** 3
+# Keys longer than this mark a column for rebalancing
+RANK_REBALANCE_LENGTH = RANK_HEAD_WIDTH + 8
+
+
+def _encode_head(value):
+    digits = []
+    for _ in range(RANK_HEAD_WIDTH):
+        value, digit = divmod(value, RANK_BASE)
+        digits.append(RANK_DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def _decode_head(key):
+    value = 0
+    for char in key[:RANK_HEAD_WIDTH]:
+        value = value * RANK_BASE + RANK_DIGITS.index(char)
+    return value
+
+
+def _midpoint(low, high):
+    """
+    A digit string strictly between fractions .low and .high (high=None means
+    1). Neither bound may end in "0", and neither does the result.
+    """
+    if high is not None:
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else "0") == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+    low_digit = RANK_DIGITS.index(low[0]) if low else 0
+    high_digit = RANK_DIGITS.index(high[0]) if high is not None else RANK_BASE
+    if high_digit - low_digit > 1:
+        return RANK_DIGITS[(low_digit + high_digit) // 2]
+    if high is not None and len(high) > 1:
+        return high[:1]
+    return RANK_DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def is_valid_rank(key):
+    return (
+        isinstance(key, str) and len(key) >= RANK_HEAD_WIDTH and key != _encode_head(0)
+        and all(char in RANK_DIGITS for char in key) and not key[RANK_HEAD_WIDTH:].endswith("0")
+    )
+
+
+def rank_between(before, after):
+    """
+    A key sorting strictly between `before` and `after`; either may be None
+    for the start or end of the column.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Rank {before!r} does not sort before {after!r}")
+    if before is None and after is None:
+        return _encode_head((RANK_HEAD_MAX + 1) // 2)
+
+    if after is None:
+        low = _decode_head(before)
+        if low + RANK_STEP <= RANK_HEAD_MAX:
+            return _encode_head(low + RANK_STEP)
+        return before[:RANK_HEAD_WIDTH] + _midpoint(before[RANK_HEAD_WIDTH:], None)
+
+    high = _decode_head(after)
+    if before is None:
+        if high - RANK_STEP > 0:
+            return _encode_head(high - RANK_STEP)
+        if high > 1:
+            return _encode_head(high // 2)
+        if after[RANK_HEAD_WIDTH:]:
+            return after[:RANK_HEAD_WIDTH] + _midpoint("", after[RANK_HEAD_WIDTH:])
+        return _encode_head(high - 1) + _midpoint("", None)
+
+    low = _decode_head(before)
+    if high - low > 1:
+        return _encode_head((low + high) // 2)
+    # Adjacent or equal heads: bisect the tails
+    upper_tail = after[RANK_HEAD_WIDTH:] if high == low else None
+    return before[:RANK_HEAD_WIDTH] + _midpoint(before[RANK_HEAD_WIDTH:], upper_tail)
+
+
+def spread_ranks(count):
+    """`count` short, evenly spaced keys in ascending order"""
+    step = min(RANK_STEP, RANK_HEAD_MAX // (count + 1)) or 1
+    start = max((RANK_HEAD_MAX + 1) // 2 - step * (count // 2), step)
+    return [_encode_head(start + step * index) for index in range(count)]
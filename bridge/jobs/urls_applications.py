@@ -11,6 +11,8 @@ urlpatterns = [
     
     # Recruiter views
     path("recruiter/", views_applications.recruiter_applications, name="recruiter_applications"),
+    path("recruiter/column/", views_applications.kanban_column_api, name="kanban_column_api"),
+    path("recruiter/analytics/", views_applications.pipeline_analytics_api, name="pipeline_analytics_api"),
     path("<int:pk>/", views_applications.application_detail, name="application_detail"),
     
     # Application management
@@ -18,6 +20,8 @@ urlpatterns = [
     path("<int:pk>/toggle-flag/", views_applications.toggle_flag, name="toggle_flag"),
     path("<int:pk>/update-priority/", views_applications.update_priority, name="update_priority"),
     path("bulk-update/", views_applications.bulk_update_status, name="bulk_update_status"),
+    path("reorder/", views_applications.reorder_applications, name="reorder_applications"),
+    path("batch/", views_applications.mutate_applications, name="mutate_applications"),
 ]
 
 
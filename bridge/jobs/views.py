@@ -16,6 +16,7 @@ import math
 from .models import Job, Skill, Application
 from django.views.decorators.http import require_POST
 from accounts.models import JobSeekerProfile
+from accounts.stats import stat_counts
 from .decorators import admin_required
 from .forms import JobForm
 
@@ -404,13 +405,11 @@ def moderate_jobs(request):
     paginator = Paginator(jobs, 20)
     page_obj = paginator.get_page(request.GET.get("page"))
 
-    status_counts = {
-        "all": Job.objects.count(),
-        "active": Job.objects.filter(moderation_status=Job.ModerationStatus.ACTIVE).count(),
-        "pending": Job.objects.filter(moderation_status=Job.ModerationStatus.PENDING).count(),
-        "flagged": Job.objects.filter(moderation_status=Job.ModerationStatus.FLAGGED).count(),
-        "removed": Job.objects.filter(moderation_status=Job.ModerationStatus.REMOVED).count(),
-    }
+    # Maintained counters rather than COUNT queries (see accounts.stats)
+    counts = stat_counts()
+    status_counts = {"all": counts["jobs"]}
+    for status in Job.ModerationStatus.values:
+        status_counts[status] = counts[f"jobs.{status}"]
 
     context = {
         "page_obj": page_obj,
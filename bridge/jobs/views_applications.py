@@ -1,13 +1,19 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.text import Truncator
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib import messages
-from django.db.models import Q, Count, Prefetch
+from django.db import transaction
+from django.db.models import Q, F, Count, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 import json
 
-from .models import Application, Job
+from .models import Application, ApplicationStageEvent, Job
+from .ranking import rank_between
 from accounts.models import JobSeekerProfile
 from .forms import (
     ApplicationStatusForm,
@@ -43,6 +49,62 @@ def my_applications(request):
     )
 
 
+# Cards returned per request for one (job, status) column of the recruiter Kanban board
+KANBAN_COLUMN_PAGE_SIZE = 20
+
+
+def filter_applications(qs, filter_form):
+    """Apply the Kanban filter form to an Application queryset"""
+    if not filter_form.is_valid():
+        return qs
+
+    # Filter by job
+    if filter_form.cleaned_data.get('job'):
+        qs = qs.filter(job=filter_form.cleaned_data['job'])
+
+    # Filter by status
+    if filter_form.cleaned_data.get('status'):
+        qs = qs.filter(status=filter_form.cleaned_data['status'])
+
+    # Filter by priority
+    if filter_form.cleaned_data.get('priority'):
+        qs = qs.filter(priority=filter_form.cleaned_data['priority'])
+
+    # Filter flagged only
+    if filter_form.cleaned_data.get('flagged_only'):
+        qs = qs.filter(flagged=True)
+
+    # Search by name or email
+    search_query = filter_form.cleaned_data.get('search')
+    if search_query:
+        qs = qs.filter(
+            Q(applicant__username__icontains=search_query) |
+            Q(applicant__email__icontains=search_query) |
+            Q(applicant__first_name__icontains=search_query) |
+            Q(applicant__last_name__icontains=search_query)
+        )
+    return qs
+
+
+def kanban_column_stats(qs):
+    """
+    Per-(job, status) counts plus dashboard totals, from a single GROUP BY query
+    with conditional aggregates.
+    """
+    rows = qs.order_by().values('job_id', 'status').annotate(
+        count=Count('id'),
+        flagged=Count('id', filter=Q(flagged=True)),
+        high_priority=Count('id', filter=Q(priority=Application.Priority.HIGH)),
+    )
+    stats = {'columns': {}, 'total': 0, 'flagged': 0, 'high_priority': 0}
+    for row in rows:
+        stats['columns'][(row['job_id'], row['status'])] = row['count']
+        stats['total'] += row['count']
+        stats['flagged'] += row['flagged']
+        stats['high_priority'] += row['high_priority']
+    return stats
+
+
 @login_required
 def recruiter_applications(request):
     """Enhanced Kanban-style view for recruiters to manage applicants"""
@@ -53,89 +115,51 @@ def recruiter_applications(request):
         new_status = request.POST.get("status")
         if application_id and new_status:
             application = get_object_or_404(Application, pk=application_id, job__posted_by=request.user)
-            old_status = application.status
-            application.status = new_status
-            application.save()
-            messages.success(request, f"Moved applicant to {application.get_status_display()}")
+            _expect_posted_version(application, request.POST.get("version"))
+            if new_status not in dict(Application.Status.choices):
+                messages.error(request, "Invalid status selected.")
+            elif application.save_if_current(status=new_status):
+                messages.success(request, f"Moved applicant to {application.get_status_display()}")
+            else:
+                messages.error(request, "This application was changed by someone else. Please try again.")
             return redirect(request.path + '?' + request.GET.urlencode())
 
     # Initialize filter form
     filter_form = ApplicationFilterForm(request.GET or None, user=request.user)
 
     # Base queryset - all applications for jobs posted by this recruiter
-    qs = Application.objects.filter(
-        job__posted_by=request.user
-    ).select_related(
-        "job",
-        "applicant",
-        "applicant__jobseeker_profile"
-    ).prefetch_related(
-        "applicant__jobseeker_profile__skills"
-    )
+    qs = filter_applications(Application.objects.filter(job__posted_by=request.user), filter_form)
 
-    # Apply filters from form
-    if filter_form.is_valid():
-        # Filter by job
-        if filter_form.cleaned_data.get('job'):
-            qs = qs.filter(job=filter_form.cleaned_data['job'])
-
-        # Filter by status
-        if filter_form.cleaned_data.get('status'):
-            qs = qs.filter(status=filter_form.cleaned_data['status'])
-
-        # Filter by priority
-        if filter_form.cleaned_data.get('priority'):
-            qs = qs.filter(priority=filter_form.cleaned_data['priority'])
-
-        # Filter flagged only
-        if filter_form.cleaned_data.get('flagged_only'):
-            qs = qs.filter(flagged=True)
-
-        # Search by name or email
-        search_query = filter_form.cleaned_data.get('search')
-        if search_query:
-            qs = qs.filter(
-                Q(applicant__username__icontains=search_query) |
-                Q(applicant__email__icontains=search_query) |
-                Q(applicant__first_name__icontains=search_query) |
-                Q(applicant__last_name__icontains=search_query)
-            )
+    # One conditional aggregation gives every column count and the dashboard stats
+    column_stats = kanban_column_stats(qs)
 
-    # Group by job, then by status for Kanban layout
-    jobs_map = {}
-    for app in qs:
-        if app.job not in jobs_map:
-            jobs_map[app.job] = {'applications': {key: [] for key, _ in Application.Status.choices}, 'recommended_candidates': []}
-        jobs_map[app.job]['applications'][app.status].append(app)
+    # Only headers and counts are rendered; cards load per column from kanban_column_api
+    jobs = Job.objects.in_bulk({job_id for job_id, _ in column_stats['columns']})
 
     # Format data for template
     grouped = []
-    for job, data in jobs_map.items():
-        apps_by_status = data['applications']
-
+    for job_id, job in jobs.items():
         status_groups = []
         for key, label in Application.Status.choices:
-            apps_in_status = apps_by_status.get(key, [])
             status_groups.append({
                 "key": key,
                 "label": label,
-                "apps": apps_in_status,
-                "count": len(apps_in_status)
+                "count": column_stats['columns'].get((job_id, key), 0),
             })
 
         grouped.append({
             "job": job,
             "status_groups": status_groups,
-            "total_applicants": sum(len(apps) for apps in apps_by_status.values()),
+            "total_applicants": sum(group["count"] for group in status_groups),
         })
 
     # Sort jobs by company and title
     grouped.sort(key=lambda x: (x['job'].company, x['job'].title))
 
     # Statistics for dashboard
-    total_applications = qs.count()
-    flagged_count = qs.filter(flagged=True).count()
-    high_priority_count = qs.filter(priority=Application.Priority.HIGH).count()
+    total_applications = column_stats['total']
+    flagged_count = column_stats['flagged']
+    high_priority_count = column_stats['high_priority']
 
     context = {
         "grouped": grouped,
@@ -150,6 +174,493 @@ def recruiter_applications(request):
     return render(request, "applications/recruiter_applications.html", context)
 
 
+def _card_payload(app):
+    """JSON-ready Kanban card"""
+    profile = getattr(app.applicant, 'jobseeker_profile', None)
+    skills = [skill.name for skill in profile.skills.all()] if profile else []
+    return {
+        'id': app.id,
+        'name': app.applicant.get_full_name() or app.applicant.username,
+        'first_name': app.applicant.first_name or app.applicant.username,
+        'email': app.applicant.email,
+        'skills': skills[:3],
+        'more_skills': max(len(skills) - 3, 0),
+        'days_in_stage': app.days_in_current_stage(),
+        'priority': app.priority,
+        'flagged': app.flagged,
+        'recruiter_notes': Truncator(app.recruiter_notes).words(10),
+        'stage_rank': app.stage_rank,
+        'version': app.version,
+        'detail_url': reverse('applications:application_detail', args=[app.id]),
+        'toggle_flag_url': reverse('applications:toggle_flag', args=[app.id]),
+    }
+
+
+@login_required
+def kanban_column_api(request):
+    """
+    One page of cards for a (job, status) Kanban column, ordered by
+    stage_rank. Pass ?after=<next cursor> for the following page; the
+    board's other filters (priority, flagged_only, search) apply as well.
+    """
+    try:
+        job_id = int(request.GET['job'])
+        after = request.GET.get('after')
+        after_rank, after_id = after.rsplit('-', 1) if after else (None, None)
+        after_id = int(after_id) if after else None
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Invalid job or cursor'}, status=400)
+    status = request.GET.get('status')
+    if status not in dict(Application.Status.choices):
+        return JsonResponse({'error': 'Invalid status'}, status=400)
+
+    filter_form = ApplicationFilterForm(request.GET, user=request.user)
+    qs = filter_applications(
+        Application.objects.filter(job__posted_by=request.user, job_id=job_id, status=status),
+        filter_form,
+    )
+    # Keyset pagination on (stage_rank, id), served by the column index
+    if after_id is not None:
+        qs = qs.filter(Q(stage_rank__gt=after_rank) | Q(stage_rank=after_rank, id__gt=after_id))
+    page = list(
+        qs.select_related('applicant', 'applicant__jobseeker_profile')
+        .prefetch_related('applicant__jobseeker_profile__skills')
+        .order_by('stage_rank', 'id')[:KANBAN_COLUMN_PAGE_SIZE + 1]
+    )
+    has_more = len(page) > KANBAN_COLUMN_PAGE_SIZE
+    page = page[:KANBAN_COLUMN_PAGE_SIZE]
+
+    return JsonResponse({
+        'cards': [_card_payload(app) for app in page],
+        'next': f"{page[-1].stage_rank}-{page[-1].id}" if has_more else None,
+    })
+
+
+# Moves accepted per reorder request; bounds how far one batch can lengthen rank keys
+KANBAN_REORDER_MAX_MOVES = 100
+# Columns whose keys grow past this are re-spaced within the request; the
+# rebalance_kanban_ranks command keeps them well below it
+KANBAN_INLINE_REBALANCE_LENGTH = 40
+
+
+def _parse_moves(body):
+    """
+    Validated list of (application_id, status or None, previous_id, next_id,
+    version or None)
+    """
+    data = json.loads(body)
+    moves = data.get('moves') if isinstance(data, dict) else None
+    if not isinstance(moves, list) or not 0 < len(moves) <= KANBAN_REORDER_MAX_MOVES:
+        raise ValueError(f"moves must be a list of 1 to {KANBAN_REORDER_MAX_MOVES} moves")
+    parsed = []
+    for move in moves:
+        if not isinstance(move, dict):
+            raise ValueError("Each move must be an object")
+        status = move.get('status')
+        if status is not None and status not in dict(Application.Status.choices):
+            raise ValueError(f"Invalid status {status!r}")
+        parsed.append((
+            int(move['application_id']),
+            status,
+            int(move['previous_id']) if move.get('previous_id') is not None else None,
+            int(move['next_id']) if move.get('next_id') is not None else None,
+            _posted_version(move.get('version')),
+        ))
+    return parsed
+
+
+def _neighbour_rank(cards, neighbour_id, app, status):
+    """Rank of a neighbour card, ignoring ones the client saw in another column"""
+    neighbour = cards.get(neighbour_id)
+    if neighbour is None or neighbour is app or neighbour.job_id != app.job_id or neighbour.status != status:
+        return None
+    return neighbour.stage_rank
+
+
+def _batch_ranks(moved, app, status):
+    """New ranks of cards already moved into the app's column by this batch"""
+    return [
+        other.stage_rank for other in moved.values()
+        if other is not app and (other.job_id, other.status) == (app.job_id, status)
+    ]
+
+
+def _column_successor_rank(app, status, rank, moved):
+    """
+    First rank after `rank` in the app's job column for `status`, ignoring
+    the app itself; cards moved earlier in the batch count at their new ranks
+    """
+    stored = (
+        Application.objects.filter(job_id=app.job_id, status=status, stage_rank__gt=rank)
+        .exclude(pk__in=[app.pk, *moved]).order_by('stage_rank', 'id').values_list('stage_rank', flat=True).first()
+    )
+    return min((r for r in [stored, *_batch_ranks(moved, app, status)] if r is not None and r > rank), default=None)
+
+
+def _column_predecessor_rank(app, status, rank, moved):
+    """Last rank before `rank` in the column; the counterpart of _column_successor_rank"""
+    stored = (
+        Application.objects.filter(job_id=app.job_id, status=status, stage_rank__lt=rank)
+        .exclude(pk__in=[app.pk, *moved]).order_by('-stage_rank', '-id').values_list('stage_rank', flat=True).first()
+    )
+    return max((r for r in [stored, *_batch_ranks(moved, app, status)] if r and r < rank), default=None)
+
+
+@login_required
+@require_POST
+def reorder_applications(request):
+    """
+    Move Kanban cards within or across status columns. The JSON body is
+    {"moves": [{"application_id", "status", "previous_id", "next_id"}, ...]}
+    where previous_id/next_id are the cards the moved card now sits between
+    (either may be null at the edge of what the client has loaded, in
+    which case the real neighbour is looked up; both null appends) and
+    status is only needed to change column. Moves apply in order.
+
+    Each moved card gets a single new stage_rank between its neighbours, so
+    a move rewrites one row no matter how long the column is. A move may
+    carry the card's "version"; moves that change column are edits and are
+    written by compare-and-swap like mutate_applications, so the batch is
+    rejected (409, with the current state) if any of those cards was changed
+    by someone else. Reordering within a column only rewrites the rank.
+    """
+    try:
+        moves = _parse_moves(request.body)
+    except (ValueError, TypeError, KeyError) as e:
+        return JsonResponse({'error': f'Invalid moves: {e}'}, status=400)
+
+    ids = {app_id for move in moves for app_id in (move[0], move[2], move[3]) if app_id is not None}
+    cards = Application.objects.filter(job__posted_by=request.user, pk__in=ids).only(
+        'id', 'job_id', 'status', 'stage_rank', 'stage_changed_at', 'created_at', 'version',
+        'priority', 'flagged', 'recruiter_notes',
+    ).in_bulk()
+    missing = {move[0] for move in moves} - set(cards)
+    if missing:
+        return JsonResponse({'error': f'Unknown applications: {sorted(missing)}'}, status=404)
+
+    # A card the client saw at another version fails fast
+    expected = {move[0]: move[4] for move in reversed(moves) if move[4] is not None}
+    stale = [cards[app_id] for app_id, version in expected.items() if cards[app_id].version != version]
+    if stale:
+        return _conflict_response(stale)
+
+    now = timezone.now()
+    tails = {}
+    moved = {}
+    edited = set()
+    events = []
+    for app_id, status, previous_id, next_id, _ in moves:
+        app = cards[app_id]
+        status = status or app.status
+        before = _neighbour_rank(cards, previous_id, app, status)
+        after = _neighbour_rank(cards, next_id, app, status)
+        if before is None and after is None:
+            # Append: after the stored tail and anything this batch already put there
+            key = (app.job_id, status)
+            if key not in tails:
+                tails[key] = Application.objects.filter(job_id=app.job_id, status=status).column_tails().get(key)
+            before = max((rank for rank in [tails[key], *_batch_ranks(moved, app, status)] if rank), default=None)
+        elif after is None or (before is not None and before >= after):
+            # Dropped below the loaded part of a column, next to a stale
+            # neighbour, or next to neighbours reordered since the client
+            # loaded them: the real successor may be a card it never saw
+            after = _column_successor_rank(app, status, before, moved)
+        elif before is None:
+            before = _column_predecessor_rank(app, status, after, moved)
+        app.stage_rank = rank_between(before, after)
+
+        event = app.move_to_stage(status, now)
+        if event is not None:
+            events.append(event)
+            edited.add(app.pk)
+        app.updated_at = now
+        moved[app.pk] = app
+
+    with transaction.atomic():
+        # Column changes only land on rows nobody else has edited since
+        stale_ids = Application.objects.compare_and_set(
+            [app for app in moved.values() if app.pk in edited],
+            ['stage_rank', 'status', 'stage_changed_at', 'updated_at'],
+        ) if edited else []
+        if not stale_ids:
+            # Reordering within a column is not an edit: it neither checks nor bumps the version
+            Application.objects.bulk_update(
+                [app for app in moved.values() if app.pk not in edited], ['stage_rank', 'updated_at'], batch_size=500,
+            )
+            ApplicationStageEvent.objects.bulk_create(events, batch_size=500)
+            rebalanced = sorted({
+                (app.job_id, app.status) for app in moved.values()
+                if len(app.stage_rank) > KANBAN_INLINE_REBALANCE_LENGTH
+            })
+            for job_id, status in rebalanced:
+                Application.objects.filter(job_id=job_id, status=status).rebalance_ranks()
+    if stale_ids:
+        return _conflict_response(Application.objects.filter(pk__in=stale_ids))
+
+    return JsonResponse({
+        'moved': [
+            {'id': app.pk, 'status': app.status, 'stage_rank': app.stage_rank, 'version': app.version}
+            for app in moved.values()
+        ],
+        # Columns re-spaced by this request: their ranks changed, so clients reload them
+        'rebalanced': [{'job': job_id, 'status': status} for job_id, status in rebalanced],
+    })
+
+
+# Mutations accepted per batch request
+KANBAN_MUTATION_MAX = 500
+
+
+def _parse_mutations(body):
+    """
+    Validated list of (application_id, {field: value}, version) for status,
+    priority and flagged; version is None when the client sent none
+    """
+    data = json.loads(body)
+    mutations = data.get('mutations') if isinstance(data, dict) else None
+    if not isinstance(mutations, list) or not 0 < len(mutations) <= KANBAN_MUTATION_MAX:
+        raise ValueError(f"mutations must be a list of 1 to {KANBAN_MUTATION_MAX} changes")
+    parsed = []
+    for mutation in mutations:
+        if not isinstance(mutation, dict):
+            raise ValueError("Each mutation must be an object")
+        changes = {}
+        if 'status' in mutation:
+            if mutation['status'] not in dict(Application.Status.choices):
+                raise ValueError(f"Invalid status {mutation['status']!r}")
+            changes['status'] = mutation['status']
+        if 'priority' in mutation:
+            if mutation['priority'] not in dict(Application.Priority.choices):
+                raise ValueError(f"Invalid priority {mutation['priority']!r}")
+            changes['priority'] = mutation['priority']
+        if 'flagged' in mutation:
+            if not isinstance(mutation['flagged'], bool):
+                raise ValueError("flagged must be true or false")
+            changes['flagged'] = mutation['flagged']
+        if not changes:
+            raise ValueError("Each mutation must change status, priority or flagged")
+        version = _posted_version(mutation.get('version'))
+        parsed.append((int(mutation['application_id']), changes, version))
+    return parsed
+
+
+@login_required
+@require_POST
+def mutate_applications(request):
+    """
+    Apply a batch of Kanban changes in one round-trip. The JSON body is
+    {"mutations": [{"application_id", "status", "priority", "flagged"}, ...]}
+    with any subset of the three fields per entry, applied in order. An entry
+    may also carry the "version" the client last saw.
+
+    Every application is authorized by one query and all changes are written
+    in one transaction by compare-and-swap UPDATEs. The whole batch is
+    rejected if any application is unknown or not on one of the recruiter's
+    jobs (404), or was changed by someone else in the meantime (409, with the
+    current state). Cards that change status join the end of their new column
+    and get a stage event.
+    """
+    try:
+        mutations = _parse_mutations(request.body)
+    except (ValueError, TypeError, KeyError) as e:
+        return JsonResponse({'error': f'Invalid mutations: {e}'}, status=400)
+
+    applications = Application.objects.filter(
+        job__posted_by=request.user, pk__in={app_id for app_id, _, _ in mutations},
+    ).only(
+        'id', 'job_id', 'status', 'priority', 'flagged', 'recruiter_notes', 'version',
+        'stage_rank', 'stage_changed_at', 'created_at',
+    ).in_bulk()
+    missing = {app_id for app_id, _, _ in mutations} - set(applications)
+    if missing:
+        return JsonResponse({'error': f'Unknown applications: {sorted(missing)}'}, status=404)
+
+    # Compare-and-swap against the versions the client saw; a stale one fails fast
+    expected = {app_id: version for app_id, _, version in reversed(mutations) if version is not None}
+    stale = [app for app_id, app in applications.items() if expected.get(app_id, app.version) != app.version]
+    if stale:
+        return _conflict_response(stale)
+
+    # Tails of every column a card may join, in one query
+    targets = {
+        (applications[app_id].job_id, changes['status'])
+        for app_id, changes, _ in mutations if 'status' in changes
+    }
+    tails = Application.objects.filter(
+        job_id__in={job_id for job_id, _ in targets}, status__in={status for _, status in targets},
+    ).column_tails() if targets else {}
+
+    now = timezone.now()
+    fields = {'updated_at'}
+    events = []
+    for app_id, changes, _ in mutations:
+        app = applications[app_id]
+        if 'status' in changes:
+            event = app.move_to_stage(changes['status'], now)
+            if event is not None:
+                events.append(event)
+                column = (app.job_id, app.status)
+                app.stage_rank = tails[column] = rank_between(tails.get(column), None)
+                fields.update(('status', 'stage_changed_at', 'stage_rank'))
+        for field in ('priority', 'flagged'):
+            if field in changes:
+                setattr(app, field, changes[field])
+                fields.add(field)
+        app.updated_at = now
+
+    # Only the changed columns are written, and only to rows nobody else has edited since
+    with transaction.atomic():
+        stale_ids = Application.objects.compare_and_set(applications.values(), fields)
+        if not stale_ids:
+            ApplicationStageEvent.objects.bulk_create(events, batch_size=500)
+    if stale_ids:
+        return _conflict_response(Application.objects.filter(pk__in=stale_ids))
+
+    return JsonResponse({
+        'applications': [
+            {
+                'id': app.pk,
+                'status': app.status,
+                'status_display': app.get_status_display(),
+                'priority': app.priority,
+                'flagged': app.flagged,
+                'version': app.version,
+            }
+            for app in applications.values()
+        ],
+    })
+
+
+# Pipeline stages in funnel order; CLOSED is reported separately as an exit
+FUNNEL_STAGES = [
+    Application.Status.APPLIED,
+    Application.Status.REVIEW,
+    Application.Status.INTERVIEW,
+    Application.Status.OFFER,
+]
+
+
+def pipeline_funnels(events):
+    """
+    {job_id: {stage: applications that reached it or a later stage, 'closed': n}}
+    from one GROUP BY over the stage events with distinct conditional counts.
+    """
+    aggregates = {
+        stage.value: Count('application', distinct=True, filter=Q(to_status__in=FUNNEL_STAGES[index:]))
+        for index, stage in enumerate(FUNNEL_STAGES)
+    }
+    aggregates['closed'] = Count('application', distinct=True, filter=Q(to_status=Application.Status.CLOSED))
+    return {row.pop('job_id'): row for row in events.order_by().values('job_id').annotate(**aggregates)}
+
+
+def median_stage_durations(events):
+    """
+    {job_id: {stage: median seconds spent in it}} over completed stays. Each
+    (job, stage) partition is ranked by duration in SQL and only its middle one
+    or two rows are fetched.
+    """
+    partition = [F('job_id'), F('from_status')]
+    middle_rows = (
+        events.exclude(from_status='').filter(previous_stage_duration__isnull=False)
+        .annotate(
+            rank=Window(RowNumber(), partition_by=partition, order_by=F('previous_stage_duration').asc()),
+            stays=Window(Count('id'), partition_by=partition),
+        )
+        .filter(rank__gte=F('stays') / 2.0, rank__lte=F('stays') / 2.0 + 1)
+        .order_by()
+        .values_list('job_id', 'from_status', 'previous_stage_duration')
+    )
+    durations = {}
+    for job_id, stage, duration in middle_rows:
+        durations.setdefault(job_id, {}).setdefault(stage, []).append(duration.total_seconds())
+    return {
+        job_id: {stage: sum(values) / len(values) for stage, values in stages.items()}
+        for job_id, stages in durations.items()
+    }
+
+
+@login_required
+def pipeline_analytics_api(request):
+    """
+    Per-job funnel conversion and median days in each stage for the
+    recruiter's jobs (or just ?job=<id>), aggregated from ApplicationStageEvent.
+    """
+    jobs = Job.objects.filter(posted_by=request.user).order_by('-created_at')
+    if request.GET.get('job'):
+        try:
+            jobs = jobs.filter(pk=int(request.GET['job']))
+        except ValueError:
+            return JsonResponse({'error': 'Invalid job'}, status=400)
+    jobs = list(jobs.values('id', 'title', 'company'))
+
+    events = ApplicationStageEvent.objects.filter(job_id__in=[job['id'] for job in jobs])
+    funnels = pipeline_funnels(events)
+    medians = median_stage_durations(events)
+
+    results = []
+    for job in jobs:
+        counts = funnels.get(job['id'], {})
+        applied = counts.get(Application.Status.APPLIED.value, 0)
+        funnel = []
+        previous = None
+        for stage in FUNNEL_STAGES:
+            reached = counts.get(stage.value, 0)
+            funnel.append({
+                'stage': stage.value,
+                'label': stage.label,
+                'reached': reached,
+                'conversion': round(reached / previous, 3) if previous else None,
+                'overall': round(reached / applied, 3) if applied else None,
+            })
+            previous = reached
+        results.append({
+            'job_id': job['id'],
+            'title': job['title'],
+            'company': job['company'],
+            'funnel': funnel,
+            'closed': counts.get('closed', 0),
+            'median_days_in_stage': {
+                stage: round(seconds / 86400, 2) for stage, seconds in medians.get(job['id'], {}).items()
+            },
+        })
+    return JsonResponse({'jobs': results})
+
+
+def _application_state(app):
+    """Current editable state of an application, returned with 409 conflicts"""
+    return {
+        'id': app.pk,
+        'status': app.status,
+        'status_display': app.get_status_display(),
+        'priority': app.priority,
+        'flagged': app.flagged,
+        'recruiter_notes': app.recruiter_notes,
+        'version': app.version,
+    }
+
+
+def _conflict_response(apps):
+    return JsonResponse({
+        'error': 'Changed by someone else since it was loaded',
+        'current': [_application_state(app) for app in apps],
+    }, status=409)
+
+
+def _posted_version(value):
+    """Version sent by the client, or None if it sent none"""
+    return int(value) if value not in (None, '') else None
+
+
+def _expect_posted_version(app, value):
+    """Make the next save_if_current compare against the version a form was rendered with"""
+    try:
+        version = _posted_version(value)
+    except ValueError:
+        return
+    if version is not None:
+        app.version = version
+
+
 @login_required
 @require_POST
 def update_application_status(request):
@@ -158,6 +669,7 @@ def update_application_status(request):
         data = json.loads(request.body)
         app_id = data.get('application_id')
         new_status = data.get('status')
+        version = _posted_version(data.get('version'))
 
         if not app_id or not new_status:
             return JsonResponse({'error': 'Missing application_id or status'}, status=400)
@@ -168,25 +680,31 @@ def update_application_status(request):
             return JsonResponse({'error': 'Invalid status'}, status=400)
 
         # Get application and check permissions
-        app = get_object_or_404(Application, pk=app_id)
+        app = get_object_or_404(Application.objects.select_related('job'), pk=app_id)
 
         # Only allow recruiters (job posters) to modify application status
-        if app.job.posted_by != request.user:
+        if app.job.posted_by_id != request.user.pk:
             return JsonResponse({'error': 'Permission denied. Only recruiters can change application status.'}, status=403)
 
-        # Update status
-        app.status = new_status
-        app.save()
+        # Compare-and-swap against the version the client saw (or the one just loaded)
+        if version is not None:
+            app.version = version
+        if not app.save_if_current(status=new_status):
+            app.refresh_from_db()
+            return _conflict_response([app])
 
         return JsonResponse({
             'success': True,
             'application_id': app_id,
             'status': new_status,
-            'status_display': app.get_status_display()
+            'status_display': app.get_status_display(),
+            'version': app.version,
         })
 
     except json.JSONDecodeError as e:
         return JsonResponse({'error': f'Invalid JSON: {str(e)}'}, status=400)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid version'}, status=400)
     except Exception as e:
         import traceback
         print(f"Error in update_application_status: {str(e)}")
@@ -207,38 +725,43 @@ def application_detail(request, pk):
         messages.error(request, "You don't have permission to view this application.")
         return redirect('jobs:job_list')
 
-    # Handle notes form submission (recruiter only)
+    # Handle recruiter edits, each written as a compare-and-swap of only the changed field
+    response_status = 200
     if request.method == 'POST' and application.job.posted_by == request.user:
         action = request.POST.get('action')
+        changes = None
 
         if action == 'update_notes':
-            notes_form = ApplicationNotesForm(request.POST, instance=application)
+            notes_form = ApplicationNotesForm(request.POST, instance=Application(recruiter_notes=application.recruiter_notes))
             if notes_form.is_valid():
-                notes_form.save()
-                messages.success(request, "Notes updated successfully.")
-                return redirect('applications:application_detail', pk=pk)
+                changes = {'recruiter_notes': notes_form.cleaned_data['recruiter_notes']}
+                success = "Notes updated successfully."
 
         elif action == 'update_status':
             new_status = request.POST.get('status')
             if new_status in dict(Application.Status.choices):
-                application.status = new_status
-                application.save()
-                messages.success(request, f"Status updated to {application.get_status_display()}.")
-                return redirect('applications:application_detail', pk=pk)
+                changes = {'status': new_status}
+                success = f"Status updated to {dict(Application.Status.choices)[new_status]}."
 
         elif action == 'update_priority':
             new_priority = request.POST.get('priority')
             if new_priority in dict(Application.Priority.choices):
-                application.priority = new_priority
-                application.save()
-                messages.success(request, f"Priority updated to {application.get_priority_display()}.")
-                return redirect('applications:application_detail', pk=pk)
+                changes = {'priority': new_priority}
+                success = f"Priority updated to {dict(Application.Priority.choices)[new_priority]}."
 
         elif action == 'toggle_flag':
-            application.flagged = not application.flagged
-            application.save()
-            messages.success(request, f"Application {'flagged' if application.flagged else 'unflagged'}.")
-            return redirect('applications:application_detail', pk=pk)
+            changes = {'flagged': not application.flagged}
+            success = f"Application {'unflagged' if application.flagged else 'flagged'}."
+
+        if changes is not None:
+            _expect_posted_version(application, request.POST.get('version'))
+            if application.save_if_current(**changes):
+                messages.success(request, success)
+                return redirect('applications:application_detail', pk=pk)
+            # Someone else saved first: show their version instead of overwriting it
+            application.refresh_from_db()
+            messages.error(request, "This application was changed by someone else. Review the current details and try again.")
+            response_status = 409
 
     # Initialize forms
     notes_form = ApplicationNotesForm(instance=application)
@@ -253,7 +776,7 @@ def application_detail(request, pk):
         'is_recruiter': application.job.posted_by == request.user,
     }
 
-    return render(request, 'applications/application_detail.html', context)
+    return render(request, 'applications/application_detail.html', context, status=response_status)
 
 
 @login_required
@@ -261,10 +784,11 @@ def application_detail(request, pk):
 def toggle_flag(request, pk):
     """Quick toggle flag status for an application"""
     application = get_object_or_404(Application, pk=pk, job__posted_by=request.user)
-    application.flagged = not application.flagged
-    application.save()
-
-    messages.success(request, f"Application {'flagged' if application.flagged else 'unflagged'}.")
+    _expect_posted_version(application, request.POST.get('version'))
+    if application.save_if_current(flagged=not application.flagged):
+        messages.success(request, f"Application {'flagged' if application.flagged else 'unflagged'}.")
+    else:
+        messages.error(request, "This application was changed by someone else. Please try again.")
 
     # Redirect back to the referring page or kanban view
     return redirect(request.META.get('HTTP_REFERER', 'applications:recruiter_applications'))
@@ -276,13 +800,14 @@ def update_priority(request, pk):
     """Quick update priority for an application"""
     application = get_object_or_404(Application, pk=pk, job__posted_by=request.user)
     new_priority = request.POST.get('priority')
+    _expect_posted_version(application, request.POST.get('version'))
 
-    if new_priority in dict(Application.Priority.choices):
-        application.priority = new_priority
-        application.save()
+    if new_priority not in dict(Application.Priority.choices):
+        messages.error(request, "Invalid priority value.")
+    elif application.save_if_current(priority=new_priority):
         messages.success(request, f"Priority updated to {application.get_priority_display()}.")
     else:
-        messages.error(request, "Invalid priority value.")
+        messages.error(request, "This application was changed by someone else. Please try again.")
 
     return redirect(request.META.get('HTTP_REFERER', 'applications:recruiter_applications'))
 
@@ -302,11 +827,12 @@ def bulk_update_status(request):
         messages.error(request, "Invalid status selected.")
         return redirect('applications:recruiter_applications')
 
-    # Update applications (only those posted by this user)
+    # Update applications (only those posted by this user) in one UPDATE that
+    # also stamps stage_changed_at
     updated_count = Application.objects.filter(
         id__in=application_ids,
         job__posted_by=request.user
-    ).update(status=new_status)
+    ).transition(new_status)
 
     messages.success(request, f"Updated {updated_count} application(s) to {dict(Application.Status.choices)[new_status]}.")
     return redirect('applications:recruiter_applications')